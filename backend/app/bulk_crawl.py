@@ -0,0 +1,254 @@
+# app/bulk_crawl.py
+"""
+Bulk crawl: scrape → chunk → classify (→ explain/summary) for a file of
+domains or URLs, one JSON line per site.
+
+    cd backend
+    python -m app.bulk_crawl domains.txt --out results.jsonl
+    python -m app.bulk_crawl domains.txt --out results.jsonl --parquet results_parquet/ --llm
+
+Sites flow through the stages independently, so one site's scrape overlaps
+another's inference. Each stage has its own concurrency limit. Per-host
+politeness comes from the async scraper (SCRAPE_PER_HOST_LIMIT,
+SCRAPE_HOST_DELAY). Concurrent classify calls are coalesced across sites by
+the classifier's micro-batch scheduler. Results are appended and flushed as
+they finish, so the output file is also the checkpoint: re-running the same
+command skips inputs that already have an "ok" or "no_content" line in --out
+and crawls the ones that errored again (their new line is appended after the
+old one, so the last line per input wins). Explain/summary (Groq) calls only
+run with --llm.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from app.core import async_scraper
+from app.core.chunk_processor import chunk_text_for_model
+from app.core.executors import compute_executor, io_executor
+from app.core.hf_classifier import DEFAULT_MODEL, classify_chunks
+from app.core.log import configure_logging
+from app.core.streaming_fetch import collect_fetch_issues
+
+# Fixed Parquet schema so part files from different runs can be read as one dataset
+PARQUET_COLUMNS = [
+    "input", "status", "url", "error", "labels", "risks", "risk_percentage", "scores",
+    "relevant_chunks", "cascade", "fetch_issues", "chunks", "explanation", "summary", "elapsed_ms",
+]
+
+def read_inputs(path: str) -> list:
+    """One domain or URL per line; blank lines and #-comments are skipped."""
+    inputs, seen = [], set()
+    with open(path) as f:
+        for line in f:
+            item = line.split("#", 1)[0].strip()
+            if item and item not in seen:
+                seen.add(item)
+                inputs.append(item)
+    return inputs
+
+
+def completed_inputs(path: str) -> set:
+    """
+    Inputs that already have a finished result line in `path` (the resume
+    checkpoint). Error lines don't count, so failed sites are retried.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                if record.get("status") != "error":
+                    done.add(record["input"])
+            except (ValueError, KeyError, AttributeError):
+                # A torn last line from an interrupted run; that input is redone
+                continue
+    return done
+
+
+class ResultWriter:
+    """Appends JSONL lines (flushed per result) and optionally Parquet part files."""
+
+    def __init__(self, path: str, parquet_dir: str = None, parquet_rows: int = 500):
+        self.file = open(path, "a")
+        self.parquet_dir = parquet_dir
+        self.parquet_rows = parquet_rows
+        self.buffer = []
+        self.written = 0
+        if parquet_dir:
+            import pyarrow  # noqa: F401  (fail before crawling, not at the first flush)
+            os.makedirs(parquet_dir, exist_ok=True)
+
+    def write(self, record: dict):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self.written += 1
+        if self.parquet_dir:
+            self.buffer.append(record)
+            if len(self.buffer) >= self.parquet_rows:
+                self.flush_parquet()
+
+    def flush_parquet(self):
+        if not self.buffer:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Nested fields are stored as JSON strings
+        rows = []
+        for record in self.buffer:
+            row = {}
+            for column in PARQUET_COLUMNS:
+                value = record.get(column)
+                row[column] = json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+            rows.append(row)
+        name = f"part-{int(time.time() * 1000)}-{self.written}.parquet"
+        schema = pa.schema([
+            (column, pa.int64() if column == "chunks" else pa.float64() if column == "elapsed_ms" else pa.string())
+            for column in PARQUET_COLUMNS
+        ])
+        pq.write_table(pa.Table.from_pylist(rows, schema=schema), os.path.join(self.parquet_dir, name))
+        self.buffer = []
+
+    def close(self):
+        self.flush_parquet()
+        self.file.close()
+
+
+class BulkCrawler:
+    def __init__(self, model: str = DEFAULT_MODEL, chunking: str = None, llm: bool = False,
+                 fetch_concurrency: int = 32, classify_concurrency: int = None, llm_concurrency: int = 4):
+        self.model = model
+        self.chunking = chunking
+        self.llm = llm
+        self.fetch_limit = asyncio.Semaphore(fetch_concurrency)
+        # Queue a few classify calls per compute worker so the micro-batcher
+        # always has chunks from several sites to coalesce
+        self.classify_limit = asyncio.Semaphore(classify_concurrency or compute_executor.workers * 4)
+        self.llm_limit = asyncio.Semaphore(llm_concurrency)
+
+    async def analyze(self, item: str) -> dict:
+        record = {"input": item, "status": "ok"}
+        started = time.perf_counter()
+        try:
+            issues = collect_fetch_issues()
+            async with self.fetch_limit:
+                terms_url, paragraphs = await async_scraper.get_terms_text_async(item)
+            record["url"] = terms_url
+            if issues:
+                record["fetch_issues"] = issues
+            if not paragraphs:
+                record["status"] = "no_content"
+                return record
+
+            state = {"url": terms_url, "raw_text": "\n\n".join(paragraphs)}
+            async with self.classify_limit:
+                chunks, features = await compute_executor.run(chunk_text_for_model, state["raw_text"], self.model, self.chunking)
+                result = await compute_executor.run(classify_chunks, chunks, model_name=self.model, features=features)
+            state.update(result, chunks=chunks)
+            record.update(result, chunks=len(chunks))
+
+            if self.llm:
+                from app.langchain_modules.explainer import explain
+                from app.langchain_modules.summarizer import summarize
+
+                async with self.llm_limit:
+                    record["explanation"], record["summary"] = await asyncio.gather(
+                        io_executor.run(explain, state), io_executor.run(summarize, state)
+                    )
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            record["elapsed_ms"] = round(1000 * (time.perf_counter() - started), 1)
+        return record
+
+    async def run(self, inputs: list, writer: ResultWriter, workers: int):
+        queue = asyncio.Queue()
+        for item in inputs:
+            queue.put_nowait(item)
+        counts = {"ok": 0, "no_content": 0, "error": 0}
+        started = time.perf_counter()
+
+        async def worker():
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                record = await self.analyze(item)
+                writer.write(record)
+                counts[record["status"]] += 1
+                done = sum(counts.values())
+                if done % 25 == 0 or done == len(inputs):
+                    rate = done / (time.perf_counter() - started)
+                    progress(f"{done}/{len(inputs)} sites ({rate:.2f}/s) {counts}")
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(workers, len(inputs)))))
+        finally:
+            await async_scraper.close_client()
+        return counts
+
+
+def progress(message: str):
+    # Progress goes to stderr, apart from the logs (warnings only) and any data piped from stdout
+    print(message, file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape and classify policies for many domains")
+    parser.add_argument("inputs", help="file with one domain or URL per line")
+    parser.add_argument("--out", required=True, help="JSONL output; also the resume checkpoint")
+    parser.add_argument("--parquet", help="also write Parquet part files to this directory")
+    parser.add_argument("--parquet-rows", type=int, default=500, help="rows per Parquet part file")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--chunking", choices=["chars", "tokens"], default=None)
+    parser.add_argument("--llm", action="store_true", help="also run the Groq explanation and summary")
+    parser.add_argument("--workers", type=int, default=64, help="sites in flight")
+    parser.add_argument("--fetch-concurrency", type=int, default=32, help="concurrent scrapes")
+    parser.add_argument("--classify-concurrency", type=int, default=None, help="concurrent chunk+classify calls")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="concurrent sites in the LLM stage")
+    parser.add_argument("--host-delay", type=float, default=None, help="seconds between requests to one host")
+    args = parser.parse_args()
+
+    # Per-site scrape logs would drown the progress lines; only warnings by default
+    configure_logging(os.getenv("LOG_LEVEL", "WARNING"))
+    if args.host_delay is not None:
+        async_scraper.HOST_DELAY = args.host_delay
+    # The crawler bounds its own stages; the executors' admission limits are
+    # there for the API's 429 backpressure and would only fail sites here
+    compute_executor.max_pending = io_executor.max_pending = 1 << 30
+
+    inputs = read_inputs(args.inputs)
+    done = completed_inputs(args.out)
+    remaining = [item for item in inputs if item not in done]
+    progress(f"{len(inputs)} inputs, {len(inputs) - len(remaining)} already done in {args.out}, {len(remaining)} to crawl")
+    if not remaining:
+        return
+
+    crawler = BulkCrawler(
+        model=args.model,
+        chunking=args.chunking,
+        llm=args.llm,
+        fetch_concurrency=args.fetch_concurrency,
+        classify_concurrency=args.classify_concurrency,
+        llm_concurrency=args.llm_concurrency,
+    )
+    writer = ResultWriter(args.out, args.parquet, args.parquet_rows)
+    try:
+        counts = asyncio.run(crawler.run(remaining, writer, args.workers))
+    finally:
+        writer.close()
+        compute_executor.shutdown()
+        io_executor.shutdown()
+    progress(f"Crawl finished: {counts}")
+
+
+if __name__ == "__main__":
+    main()
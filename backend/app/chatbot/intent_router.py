@@ -1,4 +1,7 @@
 from app.langchain_modules.llm import get_llm
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
 
 INTENT_PROMPT = """
 Classify the user's intent into ONE of the following categories:
@@ -53,6 +56,6 @@ def detect_intent(message: str) -> str:
             # Default to RAG if unclear
             return "RAG_QUESTION"
     except Exception as e:
-        print(f"Intent detection error: {e}")
+        logger.warning("Intent detection failed", extra={"error": str(e)})
         # Default to RAG on error
         return "RAG_QUESTION"
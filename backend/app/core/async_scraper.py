@@ -0,0 +1,327 @@
+# app/core/async_scraper.py
+"""
+Async equivalents of app.core.web_scraper on a shared, pooled httpx client.
+
+One AsyncClient per event loop is reused for every fetch (keep-alive, HTTP/2
+when the `h2` package is installed), with a global connection limit, a
+per-host concurrency limit and a per-request timeout. get_terms_text_async()
+as a whole is bounded by SCRAPE_BUDGET seconds. The client and the per-host
+state are bound to the loop that created them, so a second asyncio.run()
+(tests, scripts) gets its own; at most SCRAPE_MAX_HOSTS idle hosts are kept.
+
+For tests, point the scraper at a local stand-in server by installing a
+client with set_client(httpx.AsyncClient(transport=...)).
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import httpx
+
+from .executors import compute_executor
+from .link_discovery import DISCOVERY_DEADLINE, CandidateSelector, candidate_urls
+from .page_cache import page_cache
+from .streaming_fetch import read_body_async
+from .web_scraper import (
+    BROWSER_HEADERS,
+    MOBILE_USER_AGENT,
+    cached_paragraphs,
+    is_direct_policy_url,
+    normalize_url,
+    parse_paragraphs,
+)
+from .log import get_logger
+from .profiling import span
+
+logger = get_logger(__name__)
+
+FETCH_TIMEOUT = float(os.getenv("SCRAPE_TIMEOUT", "15"))
+CONNECT_TIMEOUT = float(os.getenv("SCRAPE_CONNECT_TIMEOUT", "5"))
+SCRAPE_BUDGET = float(os.getenv("SCRAPE_BUDGET", "30"))
+MAX_CONNECTIONS = int(os.getenv("SCRAPE_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.getenv("SCRAPE_MAX_KEEPALIVE", "20"))
+PER_HOST_LIMIT = int(os.getenv("SCRAPE_PER_HOST_LIMIT", "4"))
+HOST_DELAY = float(os.getenv("SCRAPE_HOST_DELAY", "0"))
+MAX_HOSTS = int(os.getenv("SCRAPE_MAX_HOSTS", "10000"))
+
+_override_client = None
+_loop_states = {}  # id(loop) -> _LoopState
+
+
+class _Host:
+    __slots__ = ("limit", "next_slot", "active")
+
+    def __init__(self):
+        self.limit = asyncio.Semaphore(PER_HOST_LIMIT)
+        self.next_slot = 0.0
+        self.active = 0
+
+
+class _LoopState:
+    """The client and per-host limits of one event loop."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.client = None
+        self.hosts = OrderedDict()  # host -> _Host, least recently used first
+
+    def host(self, url: str) -> _Host:
+        name = urlsplit(url).netloc.lower()
+        host = self.hosts.get(name)
+        if host is None:
+            host = self.hosts[name] = _Host()
+            self._evict()
+        self.hosts.move_to_end(name)
+        return host
+
+    def _evict(self):
+        # Only idle hosts whose politeness slot has passed can be forgotten
+        now = self.loop.time()
+        for name in list(self.hosts):
+            if len(self.hosts) <= MAX_HOSTS:
+                break
+            host = self.hosts[name]
+            if host.active == 0 and host.next_slot <= now:
+                del self.hosts[name]
+
+
+def _state() -> _LoopState:
+    loop = asyncio.get_running_loop()
+    state = _loop_states.get(id(loop))
+    if state is None or state.loop is not loop:
+        # Drop the state of loops that have finished (their clients can't be closed any more)
+        for key in [key for key, old in _loop_states.items() if old.loop.is_closed()]:
+            del _loop_states[key]
+        state = _loop_states[id(loop)] = _LoopState(loop)
+    return state
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_client() -> httpx.AsyncClient:
+    """The running loop's shared client (or the one installed with set_client)."""
+    if _override_client is not None:
+        return _override_client
+    state = _state()
+    if state.client is None:
+        state.client = httpx.AsyncClient(
+            http2=_http2_available(),
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE),
+            timeout=httpx.Timeout(FETCH_TIMEOUT, connect=CONNECT_TIMEOUT),
+            headers=BROWSER_HEADERS,
+            follow_redirects=True,
+        )
+    return state.client
+
+
+def set_client(client: httpx.AsyncClient):
+    """Use `client` for every fetch (e.g. one with a mock transport in tests); None restores the default."""
+    global _override_client
+    _override_client = client
+
+
+async def close_client():
+    """Close the running loop's client and the installed one, if any."""
+    global _override_client
+    if _override_client is not None:
+        await _override_client.aclose()
+        _override_client = None
+    state = _loop_states.pop(id(asyncio.get_running_loop()), None)
+    if state is not None and state.client is not None:
+        await state.client.aclose()
+
+
+async def _politeness_delay(host: _Host):
+    """Space requests to the same host at least HOST_DELAY seconds apart."""
+    if HOST_DELAY <= 0:
+        return
+    loop = asyncio.get_running_loop()
+    slot = max(loop.time(), host.next_slot)
+    host.next_slot = slot + HOST_DELAY
+    await asyncio.sleep(slot - loop.time())
+
+
+class FetchedPage:
+    """A streamed response whose body has been read through the size and content-type guards."""
+
+    __slots__ = ("status_code", "headers", "text", "content", "truncation")
+
+    def __init__(self, status_code: int, headers, text: str = "", content: bytes = b"", truncation: dict = None):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        self.content = content
+        self.truncation = truncation
+
+
+async def _send(client: httpx.AsyncClient, url: str, headers: dict = None) -> httpx.Response:
+    with span("http_request", url=url) as s:
+        res = await client.send(client.build_request("GET", url, headers=headers), stream=True)
+        s.set(status=res.status_code)
+        return res
+
+
+async def fetch(url: str, headers: dict = None):
+    """
+    GET `url`, retrying once with a mobile User-Agent on 401/403.
+    Returns a FetchedPage (possibly a 304 without a body), or None if access was denied.
+    """
+    client = get_client()
+    host = _state().host(url)
+    host.active += 1
+    try:
+        async with host.limit:
+            return await _fetch(client, host, url, headers)
+    finally:
+        host.active -= 1
+
+
+async def _fetch(client: httpx.AsyncClient, host: _Host, url: str, headers: dict = None):
+    await _politeness_delay(host)
+    logger.debug("Fetching", extra={"url": url})
+    res = await _send(client, url, headers)
+    logger.debug("Fetched", extra={"url": url, "status": res.status_code})
+
+    if res.status_code in [403, 401]:
+        await res.aclose()
+        logger.warning("Access denied, retrying with mobile User-Agent", extra={"url": url, "status": res.status_code})
+        await _politeness_delay(host)
+        res = await _send(client, url, {**(headers or {}), "User-Agent": MOBILE_USER_AGENT})
+        if res.status_code in [403, 401]:
+            await res.aclose()
+            return None
+
+    if res.status_code == 304:
+        await res.aclose()
+        return FetchedPage(304, res.headers)
+    if res.is_error:
+        await res.aclose()
+        res.raise_for_status()
+
+    # Streamed with a size cap and content-type check instead of buffering the body
+    text, content, truncation = await read_body_async(url, res)
+    return FetchedPage(res.status_code, res.headers, text, content, truncation)
+
+
+async def fetch_html(url: str):
+    """GET `url` and return the body, or None if access was denied."""
+    res = await fetch(url)
+    return res.text if res is not None else None
+
+
+async def _parse(html: str) -> list:
+    # HTML parsing is CPU-bound; keep it off the event loop
+    return await compute_executor.run(parse_paragraphs, html)
+
+
+async def extract_paragraphs_from_url_async(url: str) -> list:
+    try:
+        cached = await asyncio.to_thread(page_cache.lookup, url) if page_cache else None
+        if cached and page_cache.is_fresh(cached):
+            return cached_paragraphs(url, cached, "hit")
+
+        # Revalidate a stale copy with If-None-Match / If-Modified-Since
+        res = await fetch(url, headers=page_cache.validators(cached) if cached else None)
+        if res is None:
+            return []
+        if res.status_code == 304 and cached:
+            await asyncio.to_thread(page_cache.touch, url, cached, res.headers)
+            return cached_paragraphs(url, cached, "revalidated")
+
+        paragraphs = await _parse(res.text)
+        if page_cache:
+            await asyncio.to_thread(page_cache.store, url, res.content, res.headers, paragraphs, res.truncation)
+            page_cache.record(url, "miss")
+        return paragraphs
+    except Exception as e:
+        logger.error("Could not extract paragraphs", extra={"url": url, "error": str(e)})
+        return []
+
+
+async def fetch_landing_page_async(base_url: str):
+    try:
+        return await fetch_html(base_url)
+    except Exception as e:
+        logger.error("Could not fetch links", extra={"url": base_url, "error": str(e)})
+        return None
+
+
+async def discover_policy_async(base_url: str, html):
+    """Async discover_policy(): probe the ranked candidates concurrently under DISCOVERY_DEADLINE."""
+    candidates = await compute_executor.run(candidate_urls, html, base_url)
+    if not candidates:
+        return None, []
+    logger.debug("Probing policy candidates", extra={"candidates": candidates})
+
+    selector = CandidateSelector(candidates)
+    pending = {asyncio.ensure_future(extract_paragraphs_from_url_async(url)): url for url in candidates}
+    deadline = asyncio.get_running_loop().time() + DISCOVERY_DEADLINE
+    try:
+        while pending and not selector.done():
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                logger.warning("Discovery deadline reached", extra={"outstanding": len(pending)})
+                break
+            finished, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                selector.add(pending.pop(task), task.result())
+    finally:
+        for task in pending:
+            task.cancel()
+    return selector.best()
+
+
+async def _get_terms_text(base_url: str):
+    is_direct_candidate = is_direct_policy_url(base_url)
+
+    if is_direct_candidate:
+        target_url = normalize_url(base_url)
+        paragraphs = await extract_paragraphs_from_url_async(target_url)
+        if paragraphs and len(paragraphs) > 2:
+            logger.info("Scraped direct policy link", extra={"url": target_url})
+            return target_url, paragraphs
+        logger.info("Direct link yielded too little text, looking for policy links", extra={"url": base_url})
+
+    base_html = await fetch_landing_page_async(normalize_url(base_url))
+    terms_url, paragraphs = await discover_policy_async(normalize_url(base_url), base_html)
+    if terms_url:
+        logger.info("Found policy link", extra={"url": terms_url})
+        return terms_url, paragraphs
+
+    if not is_direct_candidate:
+        logger.info("No policy link found, falling back to the base URL", extra={"url": base_url})
+        target_url = normalize_url(base_url)
+        if base_html:
+            paragraphs = await _parse(base_html)
+        else:
+            paragraphs = await extract_paragraphs_from_url_async(target_url)
+        if paragraphs:
+            return target_url, paragraphs
+
+    logger.warning("No terms page or content found", extra={"url": base_url})
+    return None, []
+
+
+async def get_terms_text_async(base_url: str):
+    """Async get_terms_text(): (terms_url, paragraphs) within SCRAPE_BUDGET seconds."""
+    try:
+        return await asyncio.wait_for(_get_terms_text(base_url), timeout=SCRAPE_BUDGET)
+    except asyncio.TimeoutError:
+        logger.error("Scrape budget exceeded", extra={"url": base_url, "budget_s": SCRAPE_BUDGET})
+        return None, []
+
+
+async def scrape_policy_async(url: str) -> str:
+    """Async scrape_policy(): the combined policy text, or "" if nothing was found."""
+    terms_url, paragraphs = await get_terms_text_async(url)
+    if not paragraphs:
+        return ""
+    return "\n\n".join(paragraphs)
@@ -0,0 +1,161 @@
+# app/core/batch_scheduler.py
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class SchedulerFull(Exception):
+    """Raised when the scheduler queue for a model is at capacity."""
+
+
+class _Request:
+    __slots__ = ("features", "future", "enqueued_at")
+
+    def __init__(self, features: list):
+        self.features = features
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class _ModelQueue:
+    """
+    Bounded request queue plus one worker thread for a single model key.
+    The worker coalesces requests until `max_batch_size` chunks are collected
+    or `max_wait_ms` has passed since the first one, then runs them together.
+    """
+
+    def __init__(self, model_key: str, run_fn, max_batch_size: int, max_wait_ms: float, max_queue: int):
+        self.model_key = model_key
+        self.run_fn = run_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = queue.Queue(maxsize=max_queue)
+
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.chunks = 0
+        self.requests = 0
+        self.max_batch_seen = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+
+        self.thread = threading.Thread(target=self._loop, name=f"microbatch-{model_key}", daemon=True)
+        self.thread.start()
+
+    def submit(self, features: list) -> Future:
+        request = _Request(features)
+        try:
+            self.queue.put_nowait(request)
+        except queue.Full:
+            raise SchedulerFull(f"Classifier queue for '{self.model_key}' is full")
+        return request.future
+
+    def _collect(self) -> list:
+        first = self.queue.get()
+        pending = [first]
+        size = len(first.features)
+        deadline = first.enqueued_at + self.max_wait
+
+        while size < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                request = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            pending.append(request)
+            size += len(request.features)
+        return pending
+
+    def _loop(self):
+        while True:
+            pending = self._collect()
+            started = time.perf_counter()
+            features = [f for request in pending for f in request.features]
+
+            try:
+                scores = self.run_fn(self.model_key, features)
+            except Exception as e:
+                for request in pending:
+                    request.future.set_exception(e)
+                continue
+
+            # Hand each request back its own slice of the batch (plus the
+            # batch timing, which profiled requests attach to their span tree)
+            finished = time.perf_counter()
+            offset = 0
+            for request in pending:
+                n = len(request.features)
+                request.future.batch_info = {
+                    "enqueued": request.enqueued_at, "started": started, "finished": finished,
+                    "batch_size": len(features), "requests": len(pending),
+                }
+                request.future.set_result(scores[offset:offset + n])
+                offset += n
+
+            with self.lock:
+                self.batches += 1
+                self.chunks += len(features)
+                self.requests += len(pending)
+                self.max_batch_seen = max(self.max_batch_seen, len(features))
+                for request in pending:
+                    wait = started - request.enqueued_at
+                    self.total_wait += wait
+                    self.max_wait_seen = max(self.max_wait_seen, wait)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "queue_depth": self.queue.qsize(),
+                "batches": self.batches,
+                "requests": self.requests,
+                "chunks": self.chunks,
+                "avg_batch_size": round(self.chunks / self.batches, 2) if self.batches else 0,
+                "max_batch_size": self.max_batch_seen,
+                "avg_wait_ms": round(1000 * self.total_wait / self.requests, 2) if self.requests else 0,
+                "max_wait_ms": round(1000 * self.max_wait_seen, 2),
+            }
+
+
+class MicroBatchScheduler:
+    """
+    Collects chunks from concurrent requests for the same model key and runs
+    them as one batch. `run_fn(model_key, features)` must return one score
+    row per feature, in order (anything sliceable, e.g. a NumPy matrix).
+    """
+
+    def __init__(self, run_fn, max_batch_size: int = 64, max_wait_ms: float = 5.0, max_queue: int = 256):
+        self.run_fn = run_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue = max_queue
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    def _get_queue(self, model_key: str) -> _ModelQueue:
+        with self._lock:
+            if model_key not in self._queues:
+                self._queues[model_key] = _ModelQueue(
+                    model_key, self.run_fn, self.max_batch_size, self.max_wait_ms, self.max_queue
+                )
+            return self._queues[model_key]
+
+    def submit(self, model_key: str, features: list) -> Future:
+        return self._get_queue(model_key).submit(features)
+
+    def score(self, model_key: str, features: list) -> list:
+        """Blocking helper: enqueue features and wait for their scores."""
+        return self.submit(model_key, features).result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            queues = dict(self._queues)
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "max_queue": self.max_queue,
+            "models": {key: q.stats() for key, q in queues.items()},
+        }
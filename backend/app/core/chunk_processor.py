@@ -1,7 +1,19 @@
 # app/core/chunk_processor.py
-from typing import List
+from typing import List, Optional, Tuple
+import os
 import re
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from .log import get_logger
+from .profiling import span
+
+logger = get_logger(__name__)
+
+# "chars": character splitter (default); "tokens": tokenize-once token windows
+CHUNKING_MODE = os.getenv("CHUNKING_MODE", "chars")
+TOKEN_WINDOW_SIZE = int(os.getenv("TOKEN_WINDOW_SIZE", "512"))
+TOKEN_WINDOW_STRIDE = int(os.getenv("TOKEN_WINDOW_STRIDE", "64"))
+
+# Matches end at the position right after a sentence (or right before a newline)
+SENTENCE_END = re.compile(r"[.!?][\"')\]]*(?=\s)|(?=\n)")
 
 
 def validate_chunk(chunk: str, min_chars: int = 30) -> bool:
@@ -110,6 +122,8 @@ def chunk_paragraphs_char_based(
     full_text = "\n\n".join(clean_paragraphs)
 
     # Use RecursiveCharacterTextSplitter with sentence-aware separators
+    # (imported here: langchain_text_splitters pulls in langchain_core)
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size_chars,
         chunk_overlap=chunk_overlap_chars,
@@ -156,13 +170,102 @@ def chunk_text(text: str) -> List[str]:
     # Simply split by newlines to get "paragraphs" back if possible, 
     # or pass as single list item if raw text.
     # Our chunker expects list of paragraphs.
-    if "\n\n" in text:
-        paragraphs = text.split("\n\n")
-    else:
-        paragraphs = text.split("\n")
-        
-    print(f"DEBUG: chunk_text receiving text length {len(text)}, generated {len(paragraphs)} initial paragraphs.")
+    paragraphs = split_paragraphs(text)
+
+    logger.debug("chunk_text input", extra={"text_length": len(text), "paragraphs": len(paragraphs)})
     
     chunks = chunk_paragraphs_char_based(paragraphs)
-    print(f"DEBUG: chuck_paragraphs_char_based returned {len(chunks)} chunks.")
+    logger.debug("Char chunking done", extra={"chunks": len(chunks)})
     return chunks
+
+
+def split_paragraphs(text: str) -> List[str]:
+    if "\n\n" in text:
+        return text.split("\n\n")
+    return text.split("\n")
+
+
+def chunk_text_token_windows(
+    text: str,
+    tokenizer,
+    max_tokens: int = TOKEN_WINDOW_SIZE,
+    stride: int = TOKEN_WINDOW_STRIDE,
+    min_chunk_chars: int = 50,
+    validate: bool = True,
+) -> Tuple[List[str], List[dict]]:
+    """
+    Tokenize the whole document once with a fast tokenizer and slice the ids
+    into windows of at most `max_tokens` (special tokens included), ending on
+    sentence boundaries where possible and overlapping by about `stride`
+    tokens. Each window starts at least a quarter window after the previous
+    one, whatever the stride, so the window count stays linear in the text.
+    Returns (chunk texts, model-ready features), so nothing is re-tokenized
+    or truncated downstream.
+    """
+    paragraphs = [p.strip() for p in split_paragraphs(text) if len(p.strip()) > 20]
+    if not paragraphs:
+        return [], []
+    full_text = "\n\n".join(paragraphs)
+
+    with span("tokenize", chars=len(full_text)):
+        encoding = tokenizer(full_text, add_special_tokens=False, return_offsets_mapping=True)
+    ids = encoding["input_ids"]
+    offsets = encoding["offset_mapping"]
+    n = len(ids)
+
+    max_tokens = min(max_tokens, tokenizer.model_max_length)
+    body = max_tokens - tokenizer.num_special_tokens_to_add()
+    if body < 1:
+        raise ValueError(f"max_tokens={max_tokens} leaves no room for text after special tokens")
+    stride = max(0, min(stride, body // 2))
+    min_step = max(1, body // 4)
+
+    # Token index i is a boundary if a sentence/line ends right after token i
+    sentence_ends = {m.end() for m in SENTENCE_END.finditer(full_text)}
+    is_boundary = [offsets[i][1] in sentence_ends for i in range(n)]
+
+    chunks, features = [], []
+    start = 0
+    while start < n:
+        end = min(start + body, n)
+        if end < n:
+            # Snap back to the last sentence end in the second half of the window
+            for i in range(end - 1, start + body // 2, -1):
+                if is_boundary[i]:
+                    end = i + 1
+                    break
+
+        chunk = full_text[offsets[start][0]:offsets[end - 1][1]].strip()
+        keep = validate_chunk(chunk, min_chunk_chars) if validate else len(chunk) >= min_chunk_chars
+        if keep:
+            chunks.append(chunk)
+            features.append({"input_ids": tokenizer.build_inputs_with_special_tokens(ids[start:end])})
+
+        if end >= n:
+            break
+        # Next window starts ~stride tokens back, at the nearest sentence start
+        # (at least min_step past this window's start: a window snapped back to
+        # body // 2 with a large stride would otherwise advance ~1 token)
+        target = min(max(end - stride, start + min_step), end)
+        starts = [i for i in range(max(end - 2 * stride, start + min_step), end) if is_boundary[i - 1]]
+        start = min(starts, key=lambda i: abs(i - target)) if starts else target
+
+    return chunks, features
+
+
+def chunk_text_for_model(text: str, model_key: str, mode: Optional[str] = None) -> Tuple[List[str], Optional[List[dict]]]:
+    """
+    Chunk `text` for classification with `model_key`. Returns (chunks, features);
+    features is None in "chars" mode, where the classifier tokenizes itself.
+    """
+    mode = mode or CHUNKING_MODE
+    if mode == "tokens":
+        from .hf_classifier import get_tokenizer
+
+        tokenizer = get_tokenizer(model_key)
+        if tokenizer.is_fast:
+            chunks, features = chunk_text_token_windows(text, tokenizer)
+            logger.debug("Token-window chunking done", extra={"chunks": len(chunks)})
+            return chunks, features
+        logger.warning("Token-window chunking needs a fast tokenizer, using char chunking")
+    return chunk_text(text), None
@@ -0,0 +1,66 @@
+# app/core/document_store.py
+"""
+Server-side copy of the chunks of analyzed documents.
+
+Analysis responses carry a `document_id` (a hash of the chunk texts, so the
+same policy always gets the same id) instead of echoing every chunk. Clients
+send that id back to /chat, /explain and /summarize, or page through the
+chunk text with GET /documents/{id}, where chunk i of a document is its
+stable index. Entries expire after DOCUMENT_STORE_TTL seconds without use
+and are LRU-evicted beyond DOCUMENT_STORE_MAX_ITEMS.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DOCUMENT_STORE_TTL = float(os.getenv("DOCUMENT_STORE_TTL", "3600"))
+DOCUMENT_STORE_MAX_ITEMS = int(os.getenv("DOCUMENT_STORE_MAX_ITEMS", "500"))
+
+
+def document_id(chunks: list) -> str:
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk.encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()[:24]
+
+
+class DocumentStore:
+    def __init__(self, ttl: float, max_items: int):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._items = OrderedDict()  # id -> (last used, chunks)
+        self._lock = threading.Lock()
+
+    def put(self, chunks: list) -> str:
+        doc_id = document_id(chunks)
+        with self._lock:
+            self._items[doc_id] = (time.time(), chunks)
+            self._items.move_to_end(doc_id)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return doc_id
+
+    def get(self, doc_id: str):
+        """The chunks of `doc_id`, or None if unknown or expired."""
+        with self._lock:
+            entry = self._items.get(doc_id)
+            if entry is None:
+                return None
+            used_at, chunks = entry
+            if time.time() - used_at > self.ttl:
+                del self._items[doc_id]
+                return None
+            self._items[doc_id] = (time.time(), chunks)
+            self._items.move_to_end(doc_id)
+            return chunks
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"documents": len(self._items), "max_items": self.max_items, "ttl": self.ttl}
+
+
+document_store = DocumentStore(DOCUMENT_STORE_TTL, DOCUMENT_STORE_MAX_ITEMS)
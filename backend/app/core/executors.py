@@ -0,0 +1,117 @@
+# app/core/executors.py
+"""
+Bounded executors that keep blocking work off the FastAPI event loop.
+
+- io:      scraping, LangGraph invocations and Groq calls
+- compute: chunking and classifier inference
+
+Each stage runs at most `workers` jobs at once and admits at most
+`max_pending` jobs (running + queued). Beyond that, `Overloaded` is raised
+and the API answers 429 with a Retry-After header.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+
+class Overloaded(Exception):
+    """Raised when a stage's queue is full."""
+
+    def __init__(self, stage: str, retry_after: int):
+        super().__init__(f"'{stage}' stage is at capacity, retry in {retry_after}s")
+        self.stage = stage
+        self.retry_after = retry_after
+
+
+class StageExecutor:
+    def __init__(self, name: str, workers: int, max_pending: int, retry_after: int = 2):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-stage")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _admit(self):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise Overloaded(self.name, self.retry_after)
+            self.pending += 1
+
+    def _done(self, _future=None):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    def submit(self, fn, *args, **kwargs):
+        self._admit()
+        try:
+            # Carry the caller's context (fetch-issue lists, profiling spans) into the thread
+            future = self._pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        except Exception:
+            self._done()
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """Await `fn(*args, **kwargs)` on this stage's threads."""
+        return await asyncio.wrap_future(self.submit(partial(fn, *args, **kwargs)))
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Count a natively async job (e.g. an awaited LLM call) against this
+        stage's admission limit without occupying one of its threads.
+        """
+        self._admit()
+        try:
+            yield
+        finally:
+            self._done()
+
+    def run_sync(self, fn, *args, **kwargs):
+        """Run `fn` on this stage from another (non-event-loop) thread and wait."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+RETRY_AFTER_SECONDS = int(os.getenv("BACKPRESSURE_RETRY_AFTER", "2"))
+
+io_executor = StageExecutor(
+    "io",
+    workers=int(os.getenv("IO_WORKERS", "32")),
+    max_pending=int(os.getenv("IO_MAX_PENDING", "128")),
+    retry_after=RETRY_AFTER_SECONDS,
+)
+compute_executor = StageExecutor(
+    "compute",
+    workers=int(os.getenv("COMPUTE_WORKERS", "4")),
+    max_pending=int(os.getenv("COMPUTE_MAX_PENDING", "64")),
+    retry_after=RETRY_AFTER_SECONDS,
+)
+
+
+def executor_stats() -> dict:
+    return {"io": io_executor.stats(), "compute": compute_executor.stats()}
@@ -0,0 +1,22 @@
+# app/core/fast_json.py
+"""
+orjson serialization for API responses, SSE events and NDJSON lines.
+
+OrjsonResponse renders with orjson (NumPy arrays/scalars and non-string keys
+allowed). Endpoints that return large payloads construct it directly, which
+also skips FastAPI's jsonable_encoder pass over the whole result.
+"""
+
+import orjson
+from fastapi.responses import JSONResponse
+
+OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, option=OPTIONS)
+
+
+class OrjsonResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -1,7 +1,20 @@
 # app/core/hf_classifier.py
 
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
+import os
+import asyncio
+import base64
+import time
+import numpy as np
+
+from .batch_scheduler import MicroBatchScheduler
+from .model_registry import ModelRegistry
+from .score_cache import ScoreCache, chunk_key, features_key
+from .inference_pool import InferencePool, default_threads_per_worker
+from .log import get_logger
+from .metrics import chunks_classified, inference_batch_seconds, inference_batch_size, tokens_scored
+from .profiling import add_span, span
+
+logger = get_logger(__name__)
 
 # Configuration (Ported from backend_fastapi.py)
 AVAILABLE_MODELS = {
@@ -11,6 +24,24 @@ AVAILABLE_MODELS = {
 }
 DEFAULT_MODEL = "deberta-v2"
 
+# ONNX Runtime variants (see app/core/onnx_backend.py): key -> (base key, int8 quantized)
+ONNX_MODELS = {
+    "bert-int8": ("bert", True),
+    "deberta-int8": ("deberta", True),
+    "deberta-v2-int8": ("deberta-v2", True),
+}
+AVAILABLE_MODELS.update({key: AVAILABLE_MODELS[base] for key, (base, _) in ONNX_MODELS.items()})
+
+# Backend for the plain model keys: "torch", "onnx" or "onnx-int8"
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "torch")
+
+# Confidence cascade: the cheap model scores every chunk; chunks with any score
+# within CASCADE_MARGIN of its label threshold are re-scored by the expensive one.
+CASCADE_MODEL_KEY = "cascade"
+CASCADE_CHEAP_MODEL = os.getenv("CASCADE_CHEAP_MODEL", "bert")
+CASCADE_EXPENSIVE_MODEL = os.getenv("CASCADE_EXPENSIVE_MODEL", "deberta-v2")
+CASCADE_MARGIN = float(os.getenv("CASCADE_MARGIN", "0.15"))
+
 LABELS = [
     "First Party Collection/Use", "Third Party Sharing/Collection", "User Choice/Control", 
     "User Access, Edit & Deletion", "Data Retention", "Data Security", "Policy Change", 
@@ -31,19 +62,118 @@ THRESHOLDS = {
 }
 THRESHOLD = 0.4
 
-# Cache
-model_cache = {}
-tokenizer_cache = {}
+# Vectorized views of the tables above, indexed by label position
+THRESHOLD_ARRAY = np.array([THRESHOLDS.get(i, THRESHOLD) for i in range(len(LABELS))], dtype=np.float32)
+RISK_ARRAY = np.array([DEFAULT_OPP115_RISK.get(i, "medium") for i in range(len(LABELS))], dtype=object)
+LABEL_ARRAY = np.array(LABELS, dtype=object)
+
+# Batched inference: chunks are sorted by token length and packed into
+# batches of this size, each padded only to its own longest member.
+BATCH_SIZE = int(os.getenv("CLASSIFIER_BATCH_SIZE", "16"))
+
+# Cross-request micro-batching: chunks from concurrent requests for the same
+# model are coalesced until MICROBATCH_MAX_SIZE chunks or MICROBATCH_MAX_WAIT_MS.
+MICROBATCH_ENABLED = os.getenv("CLASSIFIER_MICROBATCH", "1") == "1"
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "5"))
+MICROBATCH_MAX_QUEUE = int(os.getenv("MICROBATCH_MAX_QUEUE", "256"))
+
+# Model registry: models listed in PRELOAD_MODELS are loaded and warmed up at
+# startup; once MODEL_MEMORY_BUDGET_MB (0 = unlimited) is exceeded the least
+# recently used models are evicted.
+PRELOAD_MODELS = [k.strip() for k in os.getenv("PRELOAD_MODELS", "").split(",") if k.strip()]
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+
+# Per-chunk score cache keyed by (model key, model revision, chunk text hash)
+SCORE_CACHE_ENABLED = os.getenv("SCORE_CACHE", "1") == "1"
+SCORE_CACHE_PATH = os.getenv(
+    "SCORE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".cache", "scores.sqlite3"),
+)
+SCORE_CACHE_MEMORY_ITEMS = int(os.getenv("SCORE_CACHE_MEMORY_ITEMS", "20000"))
+
+# Process-pool inference: 0 keeps inference in the API process
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+INFERENCE_THREADS_PER_WORKER = int(os.getenv("INFERENCE_THREADS_PER_WORKER", "0")) or default_threads_per_worker(INFERENCE_WORKERS)
+
+def resolve_model_key(model_key: str) -> str:
+    # The cascade's final say (and its tokenizer) belongs to the expensive model
+    if model_key == CASCADE_MODEL_KEY:
+        return CASCADE_EXPENSIVE_MODEL
+    return model_key if model_key in AVAILABLE_MODELS else DEFAULT_MODEL
+
+def model_backend(model_key: str):
+    """Return (backend, quantized) for a model key."""
+    if model_key in ONNX_MODELS:
+        return "onnx", ONNX_MODELS[model_key][1]
+    if CLASSIFIER_BACKEND in ("onnx", "onnx-int8"):
+        return "onnx", CLASSIFIER_BACKEND == "onnx-int8"
+    return "torch", False
+
+# model key -> revision string of the weights last loaded for it
+model_revisions = {}
+
+def import_runtime():
+    """
+    Import torch and transformers. They are imported on first use rather than
+    with this module (seconds of cold start); the startup warm-up calls this.
+    """
+    import torch  # noqa: F401
+    import transformers  # noqa: F401
+
+def _load_model(model_key: str):
+    model_name = AVAILABLE_MODELS[model_key]
+    backend, quantize = model_backend(model_key)
+    logger.info("Loading model", extra={"model": model_name, "backend": backend, "quantized": quantize})
+    if backend == "onnx":
+        from .onnx_backend import load_onnx_model
+        model, tokenizer = load_onnx_model(model_name, quantize=quantize)
+        revision = f"onnx{'-int8' if quantize else ''}@{int(os.path.getmtime(model.path))}"
+    else:
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        revision = f"torch@{getattr(model.config, '_commit_hash', None) or 'local'}"
+    model_revisions[model_key] = revision
+    return model, tokenizer
+
+def _warmup_model(model_key: str, model, tokenizer):
+    # One dummy forward pass so the first real request doesn't pay for lazy init
+    run_batches(encode_chunks(["We collect your email address."], tokenizer), model, tokenizer)
+
+registry = ModelRegistry(_load_model, warmup=_warmup_model, memory_budget_mb=MODEL_MEMORY_BUDGET_MB)
 
 def get_model_and_tokenizer(model_key: str):
-    if model_key not in AVAILABLE_MODELS:
-        model_key = DEFAULT_MODEL
-    if model_key not in model_cache:
-        model_name = AVAILABLE_MODELS[model_key]
-        print(f"Loading model: {model_name}")
-        model_cache[model_key] = AutoModelForSequenceClassification.from_pretrained(model_name)
-        tokenizer_cache[model_key] = AutoTokenizer.from_pretrained(model_name)
-    return model_cache[model_key], tokenizer_cache[model_key]
+    return registry.get(resolve_model_key(model_key))
+
+def _pooled(model_key: str) -> bool:
+    # Torch models are scored in the worker pool; ONNX sessions stay in this process
+    return inference_pool is not None and model_backend(model_key)[0] == "torch"
+
+def get_tokenizer(model_key: str):
+    """
+    Tokenizer for a model key. Pooled models are taken from the pool's shared
+    copy, so the parent never reloads one the registry has evicted.
+    """
+    key = resolve_model_key(model_key)
+    if _pooled(key):
+        return inference_pool.model(key)[1]
+    return registry.get(key)[1]
+
+def preload_models(model_keys: list = None):
+    for key in model_keys if model_keys is not None else PRELOAD_MODELS:
+        if key not in AVAILABLE_MODELS:
+            logger.warning("Skipping unknown preload model", extra={"model": key})
+            continue
+        get_model_and_tokenizer(key)
+
+def models_status() -> dict:
+    status = registry.status(AVAILABLE_MODELS.keys())
+    for key, info in status["models"].items():
+        backend, quantize = model_backend(key)
+        info["backend"] = backend + ("-int8" if quantize else "")
+    return status
 
 def get_risks(label_indices):
     return [DEFAULT_OPP115_RISK.get(i, "medium") for i in label_indices]
@@ -54,57 +184,264 @@ def risk_summary(risks):
     total = sum(counts.values())
     return {lvl: round(100*counts.get(lvl,0)/total, 1) if total else 0 for lvl in ["high","medium","low"]}
 
-def aggregate_results(chunk_results):
-    if not chunk_results:
+def empty_scores() -> np.ndarray:
+    return np.empty((0, len(LABELS)), dtype=np.float32)
+
+def aggregate_results(scores: np.ndarray, chunks: list) -> dict:
+    """
+    Aggregate a (chunks x labels) score matrix: max-pool each label over the
+    chunks, keep labels above their threshold and use the chunk with the
+    highest score as evidence.
+    """
+    if len(chunks) == 0:
         return {"labels": [], "scores": [], "risks": [], "risk_percentage": {}, "relevant_chunks": {}}
 
-    aggregated_scores = [0.0] * len(LABELS)
-    # Track which chunk text produced the max score for each label
-    best_chunks = [""] * len(LABELS)
-    
-    for result in chunk_results:
-        scores = result["scores"]
-        chunk_text = result.get("chunk", "")
-        
-        for i, score in enumerate(scores):
-            # Max Pooling
-            if score > aggregated_scores[i]:
-                aggregated_scores[i] = score
-                best_chunks[i] = chunk_text
-    
-    final_labels = []
-    final_risks = []
-    final_evidence = {}
-    
-    for i, avg_score in enumerate(aggregated_scores):
-        if avg_score > THRESHOLDS.get(i, THRESHOLD):
-            label = LABELS[i]
-            final_labels.append(label)
-            final_risks.append(DEFAULT_OPP115_RISK[i])
-            final_evidence[label] = best_chunks[i]
-            
+    aggregated_scores = scores.max(axis=0)
+    best_chunks = scores.argmax(axis=0)
+    detected = np.flatnonzero(aggregated_scores > THRESHOLD_ARRAY)
+
+    final_labels = LABEL_ARRAY[detected].tolist()
+    final_risks = RISK_ARRAY[detected].tolist()
+    final_evidence = {LABELS[i]: chunks[best_chunks[i]] for i in detected}
+
     return {
         "labels": final_labels,
-        "scores": aggregated_scores,
+        "scores": aggregated_scores.tolist(),
         "risks": final_risks,
         "risk_percentage": risk_summary(final_risks),
         "relevant_chunks": final_evidence
     }
 
-def classify_chunks(chunks: list, model_name: str = "deberta-v2") -> dict:
-    print(f"DEBUG: classify_chunks receiving {len(chunks)} chunks using model {model_name}")
-    current_model, current_tokenizer = get_model_and_tokenizer(model_name)
-    chunk_results = []
-    
-    # Simple sequential inference
-    for i, chunk in enumerate(chunks):
-        preview = chunk[:50].replace('\n', ' ')
-        print(f"DEBUG: Processing chunk {i+1}/{len(chunks)}: '{preview}...'")
-        inputs = current_tokenizer(chunk, return_tensors="pt", truncation=True, padding=True)
+def encode_score_matrix(scores: np.ndarray) -> dict:
+    """Compact per-chunk score matrix: row-major float16, base64-encoded."""
+    matrix = np.ascontiguousarray(scores, dtype="<f2")
+    return {
+        "dtype": "float16",
+        "shape": list(matrix.shape),
+        "labels": LABELS,
+        "data": base64.b64encode(matrix.tobytes()).decode("ascii"),
+    }
+
+def encode_chunks(chunks: list, tokenizer) -> list:
+    """
+    Tokenize all chunks in one call (no padding) and return one feature dict
+    per chunk, e.g. {"input_ids": [...], "attention_mask": [...]}.
+    """
+    if not chunks:
+        return []
+    with span("tokenize", chunks=len(chunks)):
+        encoded = tokenizer(chunks, truncation=True)
+    keys = list(encoded.keys())
+    return [{k: encoded[k][i] for k in keys} for i in range(len(chunks))]
+
+def run_batches(features: list, model, tokenizer, batch_size: int = None) -> np.ndarray:
+    """
+    Run the model over pre-tokenized features in length-bucketed batches.
+    Returns a (chunks x labels) float32 matrix in the original order of `features`.
+    """
+    import torch
+
+    batch_size = batch_size or BATCH_SIZE
+    # Sort by token length so each batch pads to a similar length
+    order = sorted(range(len(features)), key=lambda i: len(features[i]["input_ids"]))
+    scores = np.empty((len(features), len(LABELS)), dtype=np.float32)
+
+    for start in range(0, len(order), batch_size):
+        batch_idx = order[start:start + batch_size]
+        inputs = tokenizer.pad([features[i] for i in batch_idx], padding=True, return_tensors="pt")
         with torch.no_grad():
-            logits = current_model(**inputs).logits
-            scores = torch.sigmoid(logits).squeeze().cpu().numpy().tolist()
-            # Store chunk text with scores for evidence tracking
-            chunk_results.append({"scores": scores, "chunk": chunk})
-            
-    return aggregate_results(chunk_results)
+            logits = model(**inputs).logits
+            scores[batch_idx] = torch.sigmoid(logits).cpu().numpy()
+
+    return scores
+
+inference_pool = None
+
+def start_inference_pool():
+    """Start the inference workers (after preloading) if INFERENCE_WORKERS > 0."""
+    global inference_pool
+    if INFERENCE_WORKERS <= 0 or inference_pool is not None:
+        return
+    keys = {resolve_model_key(key) for key in PRELOAD_MODELS or [DEFAULT_MODEL] if key in AVAILABLE_MODELS}
+    pool = InferencePool(INFERENCE_WORKERS, INFERENCE_THREADS_PER_WORKER, shard_size=BATCH_SIZE)
+    pool.start(get_model_and_tokenizer, sorted(key for key in keys if model_backend(key)[0] == "torch"))
+    inference_pool = pool
+
+def stop_inference_pool():
+    global inference_pool
+    if inference_pool is not None:
+        inference_pool.stop()
+        inference_pool = None
+
+def inference_pool_stats():
+    return inference_pool.stats() if inference_pool is not None else None
+
+def _run_model(model_key: str, features: list) -> np.ndarray:
+    # Called once per (micro-)batch, so this is where batch sizes are measured
+    started = time.perf_counter()
+    inference_batch_size.observe(len(features), model=model_key)
+    tokens_scored.inc(sum(len(f["input_ids"]) for f in features), model=model_key)
+    try:
+        if _pooled(model_key):
+            return inference_pool.score(resolve_model_key(model_key), features)
+        model, tokenizer = get_model_and_tokenizer(model_key)
+        return run_batches(features, model, tokenizer)
+    finally:
+        inference_batch_seconds.observe(time.perf_counter() - started, model=model_key)
+
+scheduler = MicroBatchScheduler(
+    _run_model,
+    max_batch_size=MICROBATCH_MAX_SIZE,
+    max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+    max_queue=MICROBATCH_MAX_QUEUE,
+)
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+def score_features(features: list, model_key: str) -> np.ndarray:
+    """Score pre-tokenized features, via the micro-batch scheduler if enabled."""
+    if not features:
+        return empty_scores()
+    if _in_event_loop():
+        # Waiting on the scheduler here would stall every request on the loop
+        raise RuntimeError("score_features blocks; call it through compute_executor, not on the event loop")
+    with span("inference", model=model_key, chunks=len(features)):
+        if not MICROBATCH_ENABLED:
+            with span("forward", batch_size=len(features)):
+                return _run_model(model_key, features)
+        future = scheduler.submit(model_key, features)
+        scores = future.result()
+        # The forward pass ran on the scheduler thread; attach its timing to this request
+        info = getattr(future, "batch_info", None)
+        if info:
+            add_span("queue_wait", info["enqueued"], info["started"])
+            add_span("forward", info["started"], info["finished"],
+                     batch_size=info["batch_size"], coalesced_requests=info["requests"])
+        return scores
+
+score_cache = ScoreCache(SCORE_CACHE_PATH, SCORE_CACHE_MEMORY_ITEMS) if SCORE_CACHE_ENABLED else None
+
+def score_chunks(chunks: list, model_key: str, features: list = None) -> np.ndarray:
+    """
+    (chunks x labels) score matrix for `chunks`. Cached chunks are served from
+    the score cache; only the misses are tokenized and sent to the model.
+    `features` are pre-tokenized inputs (token-window chunking) used instead
+    of tokenizing the chunk text.
+    """
+    tokenizer = get_tokenizer(model_key)
+    if score_cache is None:
+        if features is None:
+            features = encode_chunks(chunks, tokenizer)
+        return score_features(features, model_key)
+
+    revision = model_revisions.get(model_key, "unknown")
+    if features is None:
+        keys = [chunk_key(model_key, revision, chunk) for chunk in chunks]
+    else:
+        keys = [features_key(model_key, revision, f["input_ids"]) for f in features]
+    cached = score_cache.get_many(keys)
+
+    # Score each distinct missing chunk once
+    missing = {}
+    for i, key in enumerate(keys):
+        if key not in cached and key not in missing:
+            missing[key] = i
+    if missing:
+        if features is None:
+            missing_features = encode_chunks([chunks[i] for i in missing.values()], tokenizer)
+        else:
+            missing_features = [features[i] for i in missing.values()]
+        fresh = score_features(missing_features, model_key)
+        fresh = dict(zip(missing.keys(), fresh))
+        score_cache.put_many(fresh)
+        cached.update(fresh)
+
+    logger.debug("Score cache lookup", extra={"model": model_key, "served": len(keys) - len(missing), "chunks": len(keys)})
+    if not keys:
+        return empty_scores()
+    return np.stack([cached[key] for key in keys])
+
+def score_chunks_cascade(chunks: list, features: list = None, margin: float = None):
+    """
+    Score all chunks with CASCADE_CHEAP_MODEL and re-score only the uncertain
+    ones (any label within `margin` of its threshold) with CASCADE_EXPENSIVE_MODEL.
+    `features` must come from the expensive model's tokenizer.
+    Returns (score matrix, cascade stats).
+    """
+    margin = CASCADE_MARGIN if margin is None else margin
+    scores = score_chunks(chunks, CASCADE_CHEAP_MODEL)
+
+    uncertain = np.flatnonzero((np.abs(scores - THRESHOLD_ARRAY) < margin).any(axis=1))
+    if len(uncertain):
+        escalated_features = [features[i] for i in uncertain] if features is not None else None
+        scores = scores.copy()
+        scores[uncertain] = score_chunks(
+            [chunks[i] for i in uncertain], CASCADE_EXPENSIVE_MODEL, features=escalated_features
+        )
+
+    logger.debug("Cascade escalation", extra={"escalated": len(uncertain), "chunks": len(chunks), "model": CASCADE_EXPENSIVE_MODEL})
+    return scores, {
+        "cheap_model": CASCADE_CHEAP_MODEL,
+        "expensive_model": CASCADE_EXPENSIVE_MODEL,
+        "margin": margin,
+        "total_chunks": len(chunks),
+        "escalated_chunks": int(len(uncertain)),
+    }
+
+def classify_chunks(chunks: list, model_name: str = "deberta-v2", include_score_matrix: bool = False,
+                    features: list = None) -> dict:
+    logger.debug("classify_chunks", extra={"chunks": len(chunks), "model": model_name})
+    chunks_classified.inc(len(chunks), model=model_name)
+    cascade = None
+    if model_name == CASCADE_MODEL_KEY:
+        scores, cascade = score_chunks_cascade(chunks, features=features)
+    else:
+        scores = score_chunks(chunks, resolve_model_key(model_name), features=features)
+
+    result = aggregate_results(scores, chunks)
+    if cascade is not None:
+        result["cascade"] = cascade
+    if include_score_matrix:
+        result["score_matrix"] = encode_score_matrix(scores)
+    return result
+
+def classify_documents(documents: list, model_name: str = "deberta-v2", include_score_matrix: bool = False,
+                       features: list = None) -> list:
+    """
+    classify_chunks() for many documents at once. `documents` is a list of
+    chunk lists (and `features` an optional parallel list of feature lists).
+    The union of all chunks is scored in shared batches, then split back into
+    one aggregate_results() dict per document.
+    """
+    all_chunks = [chunk for chunks in documents for chunk in chunks]
+    all_features = None
+    if features is not None and all(f is not None for f in features):
+        all_features = [f for doc_features in features for f in doc_features]
+    logger.debug("classify_documents", extra={"documents": len(documents), "chunks": len(all_chunks), "model": model_name})
+    chunks_classified.inc(len(all_chunks), model=model_name)
+
+    cascade = None
+    if model_name == CASCADE_MODEL_KEY:
+        scores, cascade = score_chunks_cascade(all_chunks, features=all_features)
+    else:
+        scores = score_chunks(all_chunks, resolve_model_key(model_name), features=all_features)
+
+    results = []
+    offset = 0
+    for chunks in documents:
+        doc_scores = scores[offset:offset + len(chunks)]
+        offset += len(chunks)
+        result = aggregate_results(doc_scores, chunks)
+        if include_score_matrix:
+            result["score_matrix"] = encode_score_matrix(doc_scores)
+        results.append(result)
+    if cascade is not None:
+        # Escalation stats are for the whole batch
+        for result in results:
+            result["cascade"] = cascade
+    return results
@@ -0,0 +1,229 @@
+# app/core/html_extract.py
+"""
+Paragraph extraction backends for scraped policy pages.
+
+Both backends implement the same four strategies and output contract
+(de-duplicated paragraphs, in order):
+
+1. text blocks (> 30 chars) inside divs whose class looks like policy content
+2. <p> texts (> 30 chars) if strategy 1 yielded fewer than 5 blocks
+3. div/section/article/li texts (> 15 words) if still empty
+4. all visible text split on blank lines (> 40 chars) as a last resort
+
+"bs4" walks a BeautifulSoup html.parser tree once per strategy. "lxml" skips
+boilerplate subtrees and collects the candidates of all four strategies in a
+single traversal, recording each element's span in one flat list of text
+strings; element texts are joined only for candidates that pass the length
+checks (computed from prefix sums), so nested divs are no longer quadratic.
+
+HTML_EXTRACTOR selects the backend: "bs4" (default), "lxml" or "auto" (lxml if
+installed). lxml is opt-in because libxml2 and html.parser still build
+different trees for some markup: nested <p> elements, CDATA sections, and \r\n
+line breaks (normalized by libxml2). On such pages the paragraphs, and so the
+classifier input, differ. benchmarks/bench_extract.py checks parity on the
+pages in benchmarks/pages.
+"""
+
+import os
+import re
+
+from bs4 import BeautifulSoup
+
+from .log import get_logger
+from .profiling import span
+
+logger = get_logger(__name__)
+
+HTML_EXTRACTOR = os.getenv("HTML_EXTRACTOR", "bs4")
+
+BOILERPLATE_TAGS = ["script", "style", "nav", "footer", "header", "aside", "noscript", "iframe", "svg", "button", "input", "form"]
+CONTENT_CLASS = re.compile(r"privacy|policy|terms|legal|content|article|main", re.I)
+GENERIC_TAGS = ("div", "section", "article", "li")
+# Not descended into by the lxml walk: BeautifulSoup decomposes the
+# boilerplate and leaves <template> contents out of stripped_strings
+SKIPPED_TAGS = frozenset(BOILERPLATE_TAGS) | {"template"}
+
+
+def _dedupe(paragraphs):
+    # Deduplicate while preserving order
+    seen = set()
+    unique_paragraphs = []
+    for p in paragraphs:
+        if p not in seen:
+            seen.add(p)
+            unique_paragraphs.append(p)
+    return unique_paragraphs
+
+
+def extract_paragraphs_bs4(html):
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Aggressive cleanup of non-content
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+
+    paragraphs = []
+
+    # Strategy 1: Look for specific privacy policy containers first
+    content_divs = soup.find_all("div", class_=CONTENT_CLASS)
+    if content_divs:
+        for div in content_divs:
+            # Extract text from these specific divs
+            texts = [t.strip() for t in div.stripped_strings if len(t.strip()) > 30]
+            paragraphs.extend(texts)
+
+    # Strategy 2: Standard <p> tags if Strategy 1 yielded little
+    if len(paragraphs) < 5:
+        for p in soup.find_all("p"):
+            text = " ".join(p.stripped_strings)
+            if text and len(text) > 30: # Filter out tiny captions
+                paragraphs.append(text)
+
+    # Strategy 3: Generic div/section text if still empty
+    if not paragraphs:
+        for tag_name in GENERIC_TAGS:
+            for tag in soup.find_all(tag_name):
+                text = " ".join(tag.stripped_strings)
+                if text and len(text.split()) > 15:  # moderate length
+                    paragraphs.append(text)
+
+    # Strategy 4: The "Nuclear Option" - just get all text and split by newlines
+    if not paragraphs:
+        logger.info("Parsing fallback: extracting all visible text")
+        visible = "\n".join(soup.stripped_strings)
+        # Split by double newlines to preserve some paragraph structure
+        raw_pars = [p.strip() for p in re.split(r"\n{2,}", visible) if len(p.strip()) > 40]
+        paragraphs = raw_pars
+
+    return _dedupe(paragraphs)
+
+
+def extract_paragraphs_lxml(html):
+    from lxml import etree
+    import lxml.html
+
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    try:
+        root = lxml.html.document_fromstring(html, parser=lxml.html.HTMLParser(encoding="utf-8"))
+    except etree.ParserError:
+        # Empty document
+        return []
+
+    # Single traversal: flat list of stripped strings in document order, plus
+    # the [start, end) span of every candidate element in that list. Spans are
+    # recorded when an element closes, so each carries its opening position to
+    # restore document order afterwards. Every text node stays its own string,
+    # as in BeautifulSoup: boilerplate elements (decomposed there), template
+    # contents and comments are skipped, but the text after them is kept as a
+    # separate string, not merged into the text before them.
+    strings = []
+    content_divs, p_tags = [], []
+    generic = {tag: [] for tag in GENERIC_TAGS}
+    starts = {}
+    order = 0
+
+    walker = etree.iterwalk(root, events=("start", "end", "comment", "pi"))
+    for event, el in walker:
+        if event == "start":
+            if el.tag in SKIPPED_TAGS:
+                walker.skip_subtree()
+                continue
+            starts[el] = (order, len(strings))
+            order += 1
+            if el.text:
+                text = el.text.strip()
+                if text:
+                    strings.append(text)
+            continue
+
+        # Comments, processing instructions and skipped elements only contribute their tail
+        if event == "end" and el in starts:
+            position, start = starts.pop(el)
+            span = (position, start, len(strings))
+            tag = el.tag
+            if tag == "div" and CONTENT_CLASS.search(el.get("class") or ""):
+                content_divs.append(span)
+            elif tag == "p":
+                p_tags.append(span)
+            if tag in generic:
+                generic[tag].append(span)
+
+        if el is not root and el.tail:
+            tail = el.tail.strip()
+            if tail:
+                strings.append(tail)
+
+    # Prefix sums: joined length and word count of any span without joining
+    char_prefix, word_prefix = [0], [0]
+    for s in strings:
+        char_prefix.append(char_prefix[-1] + len(s))
+        word_prefix.append(word_prefix[-1] + len(s.split()))
+
+    def joined_len(span):
+        _, start, end = span
+        return char_prefix[end] - char_prefix[start] + max(end - start - 1, 0)
+
+    def word_count(span):
+        _, start, end = span
+        return word_prefix[end] - word_prefix[start]
+
+    def text(span):
+        _, start, end = span
+        return " ".join(strings[start:end])
+
+    paragraphs = []
+
+    # Strategy 1: policy-looking containers, in document (pre-)order
+    content_divs.sort()
+    for _, start, end in content_divs:
+        paragraphs.extend(s for s in strings[start:end] if len(s) > 30)
+
+    # Strategy 2: <p> tags
+    if len(paragraphs) < 5:
+        p_tags.sort()
+        paragraphs.extend(text(span) for span in p_tags if joined_len(span) > 30)
+
+    # Strategy 3: generic blocks, grouped by tag name like find_all per tag
+    if not paragraphs:
+        for tag_name in GENERIC_TAGS:
+            spans = sorted(generic[tag_name])
+            paragraphs.extend(text(span) for span in spans if word_count(span) > 15)
+
+    # Strategy 4: all visible text split by blank lines
+    if not paragraphs:
+        logger.info("Parsing fallback: extracting all visible text")
+        visible = "\n".join(strings)
+        paragraphs = [p.strip() for p in re.split(r"\n{2,}", visible) if len(p.strip()) > 40]
+
+    return _dedupe(paragraphs)
+
+
+def _lxml_available():
+    try:
+        import lxml.html  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+EXTRACTORS = {
+    "bs4": extract_paragraphs_bs4,
+    "lxml": extract_paragraphs_lxml,
+}
+
+
+def get_extractor(name=None):
+    name = name or HTML_EXTRACTOR
+    if name == "auto":
+        name = "lxml" if _lxml_available() else "bs4"
+    return EXTRACTORS[name]
+
+
+def extract_paragraphs(html, backend=None):
+    """Extract de-duplicated paragraph-like text blocks from an HTML document."""
+    extractor = get_extractor(backend)
+    with span("html_parse", backend=extractor.__name__, chars=len(html or "")) as s:
+        paragraphs = extractor(html)
+        s.set(paragraphs=len(paragraphs))
+    return paragraphs
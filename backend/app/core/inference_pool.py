@@ -0,0 +1,238 @@
+# app/core/inference_pool.py
+"""
+Process pool for classifier inference.
+
+Models are loaded in the parent process and torch weights are moved into
+shared memory; the loaded models are handed to each worker, pickled as
+shared-memory handles, so N workers share one copy of the weights instead of
+loading N. Preloaded models go to every worker at start-up; any other model is
+loaded and shared the first time it is scored, and sent to a worker before its
+first request for it. Workers never load a model themselves, and a model stays
+resident for the pool's lifetime. Each worker runs with its own torch intra-op
+thread count. Requests travel over a per-worker Pipe as a small header plus
+raw int32 token ids; scores come back as raw float32 bytes.
+
+Workers are started with "forkserver" (INFERENCE_START_METHOD): forking the
+API process after torch/OpenMP and uvicorn have started their threads is not
+safe. A worker whose pipe breaks is replaced before it goes back into rotation.
+
+ONNX Runtime sessions cannot be shared between processes; callers keep
+ONNX-backed keys out of the pool.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+START_METHOD = os.getenv("INFERENCE_START_METHOD", "forkserver")
+
+
+def _worker_main(conn, threads: int, shared: dict):
+    import torch
+    from .hf_classifier import run_batches
+
+    torch.set_num_threads(threads)
+    while True:
+        try:
+            header = conn.recv()
+        except EOFError:
+            break
+        if header is None:
+            break
+        if header[0] == "model":
+            _, model_key, pair = header
+            shared[model_key] = pair
+            continue
+
+        _, model_key, lengths = header
+        ids = np.frombuffer(conn.recv_bytes(), dtype=np.int32)
+        try:
+            model, tokenizer = shared[model_key]
+            features = []
+            offset = 0
+            for length in lengths:
+                features.append({"input_ids": ids[offset:offset + length].tolist()})
+                offset += length
+            scores = run_batches(features, model, tokenizer)
+            conn.send(("ok", scores.shape))
+            conn.send_bytes(scores.tobytes())
+        except Exception as e:
+            conn.send(("error", repr(e)))
+
+    conn.close()
+
+
+class InferencePool:
+    """
+    Fixed set of inference workers. `score(model_key, features)` is
+    thread-safe; a batch larger than `shard_size` is split across idle workers.
+    `loader(key)` returns the (model, tokenizer) pair to share for a torch key.
+    """
+
+    def __init__(self, workers: int, threads_per_worker: int, shard_size: int = 16):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.shard_size = shard_size
+        self._processes = []
+        self._conns = []
+        self._idle = queue.Queue()
+        self._dispatch = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference-dispatch")
+        self._lock = threading.Lock()
+        self._ctx = None
+        self._loader = None
+        self._shared = {}   # key -> (model, tokenizer), weights in shared memory
+        self._sent = []     # per worker: keys it already holds
+        self._models_lock = threading.Lock()
+        self._live = 0
+        self.batches = 0
+        self.chunks = 0
+        self.respawns = 0
+
+    def start(self, loader, preload_keys: list):
+        # torch.multiprocessing registers the reducers that pickle shared tensors as handles
+        import torch.multiprocessing
+
+        # Load weights once in the parent; the workers receive shared-memory handles
+        self._loader = loader
+        for key in preload_keys:
+            self.model(key)
+
+        method = START_METHOD if START_METHOD in multiprocessing.get_all_start_methods() else "spawn"
+        self._ctx = torch.multiprocessing.get_context(method)
+        for i in range(self.workers):
+            self._sent.append(set())
+            process, conn = self._spawn(i)
+            self._processes.append(process)
+            self._conns.append(conn)
+            self._idle.put(i)
+        self._live = self.workers
+        logger.info("Started inference workers", extra={
+            "workers": self.workers, "threads_per_worker": self.threads_per_worker, "start_method": method,
+        })
+
+    def model(self, key: str):
+        """The shared (model, tokenizer) pair for `key`, loading it into shared memory on first use."""
+        with self._models_lock:
+            pair = self._shared.get(key)
+            if pair is None:
+                model, tokenizer = self._loader(key)
+                model.share_memory()
+                pair = self._shared[key] = (model, tokenizer)
+                logger.info("Shared model with inference workers", extra={"model": key})
+            return pair
+
+    def _spawn(self, i: int):
+        with self._models_lock:
+            shared = dict(self._shared)
+        self._sent[i] = set(shared)
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.threads_per_worker, shared),
+            name=f"inference-worker-{i}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def _replace(self, worker: int) -> bool:
+        """Swap a dead worker for a fresh process; False leaves it out of rotation."""
+        self._conns[worker].close()
+        old = self._processes[worker]
+        if old.is_alive():
+            old.kill()
+        old.join(timeout=5)
+        try:
+            process, conn = self._spawn(worker)
+        except Exception as e:
+            logger.error("Could not replace inference worker", extra={"worker": worker, "error": repr(e)})
+            with self._lock:
+                self._live -= 1
+            return False
+        self._processes[worker] = process
+        self._conns[worker] = conn
+        with self._lock:
+            self.respawns += 1
+        logger.warning("Replaced inference worker", extra={"worker": worker})
+        return True
+
+    def _checkout(self) -> int:
+        while True:
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                if self._live <= 0:
+                    raise RuntimeError("No inference workers are alive")
+
+    def _run_shard(self, model_key: str, features: list) -> np.ndarray:
+        lengths = [len(f["input_ids"]) for f in features]
+        ids = np.fromiter((t for f in features for t in f["input_ids"]), dtype=np.int32, count=sum(lengths))
+
+        worker = self._checkout()
+        conn = self._conns[worker]
+        healthy = True
+        try:
+            if model_key not in self._sent[worker]:
+                conn.send(("model", model_key, self.model(model_key)))
+                self._sent[worker].add(model_key)
+            conn.send(("score", model_key, lengths))
+            conn.send_bytes(ids.tobytes())
+            status, payload = conn.recv()
+            if status != "ok":
+                raise RuntimeError(f"Inference worker {worker} failed: {payload}")
+            scores = np.frombuffer(conn.recv_bytes(), dtype=np.float32).reshape(payload)
+        except (EOFError, OSError) as e:
+            healthy = self._replace(worker)
+            raise RuntimeError(f"Inference worker {worker} is unavailable: {e}")
+        finally:
+            if healthy:
+                self._idle.put(worker)
+        return scores
+
+    def score(self, model_key: str, features: list) -> np.ndarray:
+        shards = [features[i:i + self.shard_size] for i in range(0, len(features), self.shard_size)]
+        if len(shards) == 1:
+            scores = self._run_shard(model_key, shards[0])
+        else:
+            scores = np.concatenate(list(self._dispatch.map(lambda shard: self._run_shard(model_key, shard), shards)))
+
+        with self._lock:
+            self.batches += len(shards)
+            self.chunks += len(features)
+        return scores
+
+    def stop(self):
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+        self._dispatch.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "alive": sum(p.is_alive() for p in self._processes),
+                "idle": self._idle.qsize(),
+                "respawns": self.respawns,
+                "threads_per_worker": self.threads_per_worker,
+                "models": sorted(self._shared.copy()),
+                "batches": self.batches,
+                "chunks": self.chunks,
+            }
+
+
+def default_threads_per_worker(workers: int) -> int:
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
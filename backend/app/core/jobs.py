@@ -0,0 +1,182 @@
+# app/core/jobs.py
+"""
+In-process job queue for long analyses.
+
+POST /jobs enqueues a runner coroutine with a priority; JOB_WORKERS asyncio
+workers execute jobs highest-priority first (FIFO within a priority). A
+runner reports progress and partial results through its Job while it runs,
+which GET /jobs/{id} exposes. Queued jobs can be cancelled before they start
+and running jobs are cancelled via their task. Finished jobs are kept for
+JOB_TTL seconds.
+
+Jobs live in this process's memory: with several server processes, poll the
+process that accepted the job (or run a single API worker for jobs).
+"""
+
+import asyncio
+import itertools
+import os
+import time
+import uuid
+
+from .executors import Overloaded, RETRY_AFTER_SECONDS
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "1000"))
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class Job:
+    def __init__(self, kind: str, runner, priority: int = 0):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.runner = runner
+        self.priority = priority
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = {}
+        self.partial = None
+        self.result = None
+        self.error = None
+        self.task = None
+
+    def report(self, progress: dict = None, partial=None):
+        """Called by runners: merge progress info and/or replace the partial result."""
+        if progress:
+            self.progress.update(progress)
+        if partial is not None:
+            self.partial = partial
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "priority": self.priority,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress,
+            "partial": self.partial if self.status not in FINISHED else None,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    def __init__(self, workers: int, max_queued: int, ttl: float):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self._jobs = {}
+        self._queue = None
+        self._tasks = []
+        self._seq = itertools.count()
+        # Jobs still waiting to run; cancelled entries stay in the heap until popped
+        self._queued = 0
+        self._stopping = False
+
+    def start(self):
+        """Start the worker tasks; must be called from the running event loop."""
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        self._stopping = True
+        for job in self._jobs.values():
+            if job.task is not None:
+                job.task.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _purge(self):
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, kind: str, runner, priority: int = 0) -> Job:
+        """
+        Enqueue `runner(job)` (a coroutine function returning the job result).
+        Higher `priority` runs first. Raises Overloaded when the queue is full.
+        """
+        if self._queue is None:
+            raise RuntimeError("Job queue is not started")
+        self._purge()
+        if self._queued >= self.max_queued:
+            raise Overloaded("jobs", RETRY_AFTER_SECONDS)
+        job = Job(kind, runner, priority)
+        self._jobs[job.id] = job
+        self._queue.put_nowait((-priority, next(self._seq), job.id))
+        self._queued += 1
+        return job
+
+    def get(self, job_id: str):
+        self._purge()
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str):
+        """Cancel a queued or running job; returns the job (None if unknown)."""
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+        if job.status == QUEUED:
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            self._queued -= 1
+        elif job.task is not None:
+            job.task.cancel()
+        return job
+
+    async def _worker(self, index: int):
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                continue  # cancelled or expired while queued
+
+            self._queued -= 1
+            job.status = RUNNING
+            job.started_at = time.time()
+            job.task = asyncio.create_task(job.runner(job))
+            try:
+                job.result = await job.task
+                job.status = SUCCEEDED
+            except asyncio.CancelledError:
+                job.status = CANCELLED
+                if self._stopping or not job.task.cancelled():
+                    raise  # the worker itself is shutting down
+            except Exception as e:
+                logger.error("Job failed", extra={"job": job.id, "kind": job.kind, "error": str(e)})
+                job.status = FAILED
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                job.task = None
+
+    def stats(self) -> dict:
+        counts = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "queued": self._queued,
+            "max_queued": self.max_queued,
+            "ttl": self.ttl,
+            "jobs": counts,
+        }
+
+
+job_queue = JobQueue(JOB_WORKERS, JOB_MAX_QUEUED, JOB_TTL)
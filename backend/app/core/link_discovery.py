@@ -0,0 +1,176 @@
+# app/core/link_discovery.py
+"""
+Candidate discovery for policy pages.
+
+Links on the landing page are scored with precompiled patterns on the anchor
+text and URL path, plus a bonus for links in the footer or near the end of the
+page where policy links usually live. The top DISCOVERY_TOP_N links and a few
+common paths (/privacy, /legal/privacy, ...) are then probed concurrently by
+the scrapers, and the candidate whose extracted paragraphs look most like a
+policy wins. Probing stops at DISCOVERY_DEADLINE seconds, or earlier once a
+candidate is confidently policy-like and every better-ranked one has finished.
+"""
+
+import os
+import re
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+DISCOVERY_TOP_N = int(os.getenv("DISCOVERY_TOP_N", "3"))
+DISCOVERY_DEADLINE = float(os.getenv("DISCOVERY_DEADLINE", "10"))
+DISCOVERY_CONFIDENT = float(os.getenv("DISCOVERY_CONFIDENT", "0.5"))
+# Pages with less text than this are never policies; at POLICY_FULL_CHARS a page is not damped for size
+POLICY_MIN_CHARS = int(os.getenv("POLICY_MIN_CHARS", "400"))
+POLICY_FULL_CHARS = int(os.getenv("POLICY_FULL_CHARS", "4000"))
+DISCOVERY_GUESS_PATHS = [
+    p.strip() for p in os.getenv(
+        "DISCOVERY_GUESS_PATHS", "/privacy,/privacy-policy,/legal/privacy,/policies/privacy,/terms"
+    ).split(",") if p.strip()
+]
+
+# (pattern, weight); a link scores the best matching anchor rule plus the best path rule
+ANCHOR_RULES = [
+    (re.compile(r"privacy\s*(policy|notice|statement)", re.I), 10),
+    (re.compile(r"terms\s*(of\s*(service|use)|(and|&)\s*conditions)", re.I), 8),
+    (re.compile(r"\bprivacy\b", re.I), 7),
+    (re.compile(r"\bterms\b", re.I), 5),
+    (re.compile(r"\bpolic(y|ies)\b|\bconditions?\b|\blegal\b", re.I), 3),
+]
+PATH_RULES = [
+    (re.compile(r"privacy[-_]?(policy|notice|statement)?", re.I), 6),
+    (re.compile(r"terms|conditions|tos\b", re.I), 4),
+    (re.compile(r"polic(y|ies)|legal", re.I), 2),
+]
+PENALTY_RULES = [
+    (re.compile(r"cookie|settings|preferences|choices|opt[-_ ]?out", re.I), -3),
+    (re.compile(r"\b(login|signin|sign-in|signup|careers|blog|news|press)\b", re.I), -4),
+]
+FOOTER_HINT = re.compile(r"footer|bottom|legal", re.I)
+FOOTER_BONUS = 2
+LATE_POSITION_BONUS = 1
+OFFSITE_PENALTY = -2
+
+POLICY_TERMS = re.compile(
+    r"personal (data|information)|third[- ]part|cookie|collect|retain|retention|opt[- ]out|consent|"
+    r"disclos|privacy|data protection|gdpr|ccpa|children|security|terms|liabilit|govern(ing)? law|arbitration",
+    re.I,
+)
+
+def _in_footer(a) -> bool:
+    for parent in a.parents:
+        if parent.name == "footer":
+            return True
+        attrs = getattr(parent, "attrs", None) or {}
+        hint = " ".join(attrs.get("class", [])) + " " + attrs.get("id", "")
+        if FOOTER_HINT.search(hint):
+            return True
+    return False
+
+
+def score_link(text: str, url: str, base_host: str) -> int:
+    parts = urlsplit(url)
+    score = max((w for pattern, w in ANCHOR_RULES if pattern.search(text)), default=0)
+    score += max((w for pattern, w in PATH_RULES if pattern.search(parts.path)), default=0)
+    if score:
+        score += sum(w for pattern, w in PENALTY_RULES if pattern.search(text) or pattern.search(parts.path))
+        if parts.netloc.lower() != base_host:
+            score += OFFSITE_PENALTY
+    return score
+
+
+def rank_links(html: str, base_url: str) -> list:
+    """Return (score, url) for every policy-looking link in `html`, best first."""
+    soup = BeautifulSoup(html, "html.parser")
+    anchors = soup.find_all("a", href=True)
+    base_host = urlsplit(base_url).netloc.lower()
+
+    best = {}
+    for i, a in enumerate(anchors):
+        url = urldefrag(urljoin(base_url, a["href"].strip()))[0]
+        if not url.startswith("http"):
+            continue
+        score = score_link(a.get_text(" ", strip=True), url, base_host)
+        if score <= 0:
+            continue
+        if _in_footer(a):
+            score += FOOTER_BONUS
+        if i >= 0.7 * len(anchors):
+            score += LATE_POSITION_BONUS
+        best[url] = max(score, best.get(url, 0))
+
+    return sorted(((score, url) for url, score in best.items()), key=lambda item: -item[0])
+
+
+def guess_urls(base_url: str, exclude=()) -> list:
+    """Common policy paths on the site's origin that are not already candidates."""
+    parts = urlsplit(base_url)
+    seen = {u.rstrip("/") for u in exclude}
+    guesses = []
+    for path in DISCOVERY_GUESS_PATHS:
+        url = f"{parts.scheme}://{parts.netloc}{path}"
+        if url.rstrip("/") not in seen:
+            seen.add(url.rstrip("/"))
+            guesses.append(url)
+    return guesses
+
+
+def candidate_urls(html: str, base_url: str, top_n: int = None) -> list:
+    """Top-ranked links followed by common-path guesses, in probing priority order."""
+    top_n = DISCOVERY_TOP_N if top_n is None else top_n
+    ranked = [url for _, url in rank_links(html, base_url)[:top_n]] if html else []
+    return ranked + guess_urls(base_url, exclude=ranked + [base_url])
+
+
+def policy_likeness(paragraphs: list) -> float:
+    """
+    0..1: share of paragraphs with policy vocabulary, damped for short pages.
+    Size counts paragraphs or text length, whichever is larger, so a policy
+    extracted as one or two long blocks still scores.
+    """
+    chars = sum(len(p) for p in paragraphs)
+    if chars < POLICY_MIN_CHARS:
+        return 0.0
+    hits = sum(1 for p in paragraphs if POLICY_TERMS.search(p))
+    size = max(len(paragraphs) / 10, chars / POLICY_FULL_CHARS)
+    return hits / len(paragraphs) * min(1.0, size)
+
+
+class CandidateSelector:
+    """
+    Collects probe results for candidates given in priority order and decides
+    when probing can stop and which candidate wins. Ties on policy-likeness
+    go to the better-ranked candidate.
+    """
+
+    def __init__(self, candidates: list, confident: float = None):
+        self.candidates = candidates
+        self.confident = DISCOVERY_CONFIDENT if confident is None else confident
+        self.results = {}
+
+    def add(self, url: str, paragraphs: list):
+        self.results[url] = (policy_likeness(paragraphs), paragraphs)
+
+    def done(self) -> bool:
+        """True once a confident candidate has every better-ranked candidate finished before it."""
+        for url in self.candidates:
+            if url not in self.results:
+                return False
+            if self.results[url][0] >= self.confident:
+                return True
+        return True
+
+    def best(self):
+        """(url, paragraphs) of the most policy-like candidate, or (None, [])."""
+        best_url, best_score = None, 0.0
+        for url in self.candidates:
+            if url in self.results and self.results[url][0] > best_score:
+                best_url, best_score = url, self.results[url][0]
+        if best_url is None:
+            return None, []
+        logger.debug("Selected policy candidate", extra={"url": best_url, "score": round(best_score, 2), "probed": len(self.results)})
+        return best_url, self.results[best_url][1]
@@ -0,0 +1,66 @@
+# app/core/log.py
+"""
+Logging for the `app` package. Modules log through get_logger(__name__) and
+pass structured fields with `extra={...}`:
+
+    logger.info("analysis complete", extra={"url": url, "chunks": 42})
+
+LOG_FORMAT=text (default) prints "time level logger: message key=value ...";
+LOG_FORMAT=json prints one JSON object per line for log shippers.
+"""
+
+import json
+import logging
+import os
+import sys
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def _fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RESERVED}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **_fields(record),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s", "%H:%M:%S")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+def configure_logging(level: str = None, fmt: str = None):
+    """Attach the handler to the `app` logger (idempotent; third-party loggers are left alone)."""
+    logger = logging.getLogger("app")
+    logger.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+    if getattr(logger, "_configured", False):
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if (fmt or os.getenv("LOG_FORMAT", "text")) == "json" else TextFormatter())
+    logger.addHandler(handler)
+    logger.propagate = False
+    logger._configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    # Keep everything under the `app` hierarchy (e.g. the API module is not in the package)
+    return logging.getLogger(name if name == "app" or name.startswith("app.") else f"app.{name}")
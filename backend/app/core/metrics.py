@@ -0,0 +1,189 @@
+# app/core/metrics.py
+"""
+Minimal in-process metrics registry rendered in the Prometheus text format
+(GET /metrics). Counters and histograms are updated where the work happens;
+values that already live in component stats() (cache hits, queue depths) are
+read at scrape time through collectors registered with add_collector().
+
+Metrics are per process: with several server processes each one serves its
+own numbers (scrape them individually or run a single worker).
+"""
+
+import functools
+import inspect
+import threading
+import time
+
+from .profiling import span
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+def _label_str(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple((name, labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, key, value) for key, value in items]
+
+
+class Histogram(Counter):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        out = []
+        for key, counts, total, count in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                out.append((f"{self.name}_bucket", key + (("le", _format_value(bound)),), bucket_count))
+            out.append((f"{self.name}_sum", key, total))
+            out.append((f"{self.name}_count", key, count))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """
+        `collect()` returns [(name, kind, help, [(labels dict, value), ...]), ...]
+        for values computed at scrape time; a failing collector is skipped.
+        """
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_label_str(labels)} {_format_value(value)}")
+        for collect in self._collectors:
+            try:
+                families = collect()
+            except Exception as e:
+                lines.append(f"# collector {getattr(collect, '__name__', collect)} failed: {type(e).__name__}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_label_str(tuple(labels.items()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# --- Pipeline metrics ---
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Time until the response (or the first streamed byte) is ready", ("method", "route"))
+node_seconds = registry.histogram(
+    "graph_node_duration_seconds", "LangGraph node latency", ("node",))
+node_errors = registry.counter(
+    "graph_node_errors_total", "LangGraph node failures", ("node",))
+chunks_classified = registry.counter(
+    "classifier_chunks_total", "Chunks classified (including score-cache hits)", ("model",))
+tokens_scored = registry.counter(
+    "classifier_tokens_total", "Tokens sent through the classifier models (cache misses only)", ("model",))
+inference_batch_size = registry.histogram(
+    "inference_batch_size", "Chunks per model invocation (after micro-batching)", ("model",), SIZE_BUCKETS)
+inference_batch_seconds = registry.histogram(
+    "inference_batch_duration_seconds", "Model invocation latency per batch", ("model",))
+llm_tokens = registry.counter(
+    "llm_tokens_total", "Groq LLM tokens by graph node and kind (prompt/completion)", ("node", "kind"))
+llm_calls = registry.counter(
+    "llm_calls_total", "Groq LLM calls by graph node", ("node",))
+
+
+def timed_node(name: str, fn):
+    """Wrap a LangGraph node (sync or async) so its latency and failures are recorded (and profiled)."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                with span(name):
+                    return await fn(*args, **kwargs)
+            except Exception:
+                node_errors.inc(node=name)
+                raise
+            finally:
+                node_seconds.observe(time.perf_counter() - started, node=name)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with span(name):
+                return fn(*args, **kwargs)
+        except Exception:
+            node_errors.inc(node=name)
+            raise
+        finally:
+            node_seconds.observe(time.perf_counter() - started, node=name)
+    return wrapper
@@ -0,0 +1,118 @@
+# app/core/model_registry.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+
+def resident_size(model) -> int:
+    """Approximate resident size of a loaded model in bytes."""
+    if hasattr(model, "parameters"):
+        size = sum(p.numel() * p.element_size() for p in model.parameters())
+        size += sum(b.numel() * b.element_size() for b in model.buffers())
+        return size
+    # ONNX sessions: use the size of the serialized graph + weights
+    path = getattr(model, "path", None)
+    return os.path.getsize(path) if path and os.path.exists(path) else 0
+
+
+class ModelRegistry:
+    """
+    Thread-safe, LRU-evicting cache of (model, tokenizer) pairs.
+
+    `loader(key)` returns (model, tokenizer); `warmup(key, model, tokenizer)`
+    optionally runs a dummy forward pass right after loading. When the total
+    resident size exceeds `memory_budget_mb` (0 = unlimited) the least recently
+    used models are dropped, never the one that was just requested.
+    """
+
+    def __init__(self, loader, warmup=None, memory_budget_mb: float = 0):
+        self.loader = loader
+        self.warmup = warmup
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+
+        self._entries = OrderedDict()  # key -> {"model", "tokenizer", "size", ...}
+        self._states = {}              # key -> not_loaded | loading | loaded | evicted | failed
+        self._load_locks = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry["last_used"] = time.time()
+                return entry["model"], entry["tokenizer"]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # One loader per key: concurrent first requests wait for the same load
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    entry["last_used"] = time.time()
+                    return entry["model"], entry["tokenizer"]
+                self._states[key] = "loading"
+
+            started = time.perf_counter()
+            try:
+                model, tokenizer = self.loader(key)
+                if self.warmup:
+                    self.warmup(key, model, tokenizer)
+            except Exception:
+                with self._lock:
+                    self._states[key] = "failed"
+                raise
+
+            entry = {
+                "model": model,
+                "tokenizer": tokenizer,
+                "size": resident_size(model),
+                "load_seconds": round(time.perf_counter() - started, 2),
+                "last_used": time.time(),
+            }
+            with self._lock:
+                self._entries[key] = entry
+                self._states[key] = "loaded"
+                self._evict(keep=key)
+            return model, tokenizer
+
+    def _evict(self, keep: str):
+        if not self.memory_budget:
+            return
+        while self.resident_bytes() > self.memory_budget and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break
+            del self._entries[oldest]
+            self._states[oldest] = "evicted"
+            self.evictions += 1
+            logger.info("Evicted model", extra={"model": oldest, "budget_mb": self.memory_budget // (1024 * 1024)})
+
+    def resident_bytes(self) -> int:
+        return sum(e["size"] for e in self._entries.values())
+
+    def status(self, keys) -> dict:
+        with self._lock:
+            models = {}
+            for key in keys:
+                entry = self._entries.get(key)
+                models[key] = {
+                    "state": self._states.get(key, "not_loaded"),
+                    "resident_mb": round(entry["size"] / (1024 * 1024), 1) if entry else 0,
+                    "load_seconds": entry["load_seconds"] if entry else None,
+                    "last_used": entry["last_used"] if entry else None,
+                }
+            return {
+                "models": models,
+                "resident_mb": round(self.resident_bytes() / (1024 * 1024), 1),
+                "memory_budget_mb": self.memory_budget // (1024 * 1024),
+                "evictions": self.evictions,
+            }
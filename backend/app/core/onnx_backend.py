@@ -0,0 +1,198 @@
+# app/core/onnx_backend.py
+"""
+ONNX Runtime inference backend for the OPP-115 classifiers.
+
+Models are exported from their Hugging Face checkpoints once, optionally
+dynamically quantized to int8, and cached on disk under ONNX_CACHE_DIR.
+
+CLI:
+    python -m app.core.onnx_backend export deberta-v2 --int8
+    python -m app.core.onnx_backend parity deberta-v2-int8
+"""
+
+import os
+import argparse
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+from .log import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+ONNX_CACHE_DIR = os.getenv(
+    "ONNX_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".onnx_cache"),
+)
+ONNX_OPSET = 14
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))  # 0 = ORT default
+
+PARITY_SAMPLES = [
+    "We collect your name, email address and device identifiers when you create an account.",
+    "We may share your personal information with advertising partners and analytics providers.",
+    "You can access, update or delete your account information at any time from the settings page.",
+    "We retain your data for as long as your account is active or as needed to provide services.",
+    "We use industry-standard encryption to protect your information in transit and at rest.",
+    "We will notify you by email before any material change to this privacy policy takes effect.",
+    "Our services do not respond to Do Not Track signals sent by your browser.",
+    "This service is not directed to children under the age of 13.",
+    "If you have questions about this policy, contact our privacy team at privacy@example.com.",
+]
+
+
+class OnnxSequenceClassifier:
+    """
+    Thin wrapper around an ONNX Runtime session that mimics the HF model call
+    signature used by hf_classifier: `model(**inputs).logits`.
+    """
+
+    def __init__(self, path: str):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_INTRA_OP_THREADS:
+            options.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+
+        self.path = path
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, **inputs):
+        feed = {}
+        for name in self.input_names:
+            value = inputs.get(name)
+            if value is None:
+                # e.g. token_type_ids missing from pre-tokenized windows
+                value = torch.zeros_like(inputs["input_ids"])
+            feed[name] = value.cpu().numpy().astype(np.int64)
+        logits = self.session.run(["logits"], feed)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+    def eval(self):
+        return self
+
+
+def _model_dir(model_name: str) -> str:
+    return os.path.join(ONNX_CACHE_DIR, model_name.replace("/", "--"))
+
+
+def export_model(model_name: str, quantize: bool = False) -> str:
+    """
+    Export a HF checkpoint to ONNX (and optionally int8) if not cached yet.
+    Returns the path of the requested .onnx file.
+    """
+    out_dir = _model_dir(model_name)
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    int8_path = os.path.join(out_dir, "model-int8.onnx")
+
+    if not os.path.exists(fp32_path):
+        logger.info("Exporting model to ONNX", extra={"model": model_name, "path": fp32_path})
+        os.makedirs(out_dir, exist_ok=True)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        tokenizer.save_pretrained(out_dir)
+
+        dummy = tokenizer(["Export sample text.", "A second, somewhat longer sample sentence."],
+                          padding=True, return_tensors="pt")
+        input_names = list(dummy.keys())
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["logits"] = {0: "batch"}
+
+        tmp_path = fp32_path + ".tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (dict(dummy),),
+                tmp_path,
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=ONNX_OPSET,
+            )
+        os.replace(tmp_path, fp32_path)
+
+    if not quantize:
+        return fp32_path
+
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        logger.info("Quantizing ONNX model to int8", extra={"source": fp32_path, "path": int8_path})
+        tmp_path = int8_path + ".tmp"
+        quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+
+    return int8_path
+
+
+def load_onnx_model(model_name: str, quantize: bool = False):
+    """Return (model, tokenizer) for the ONNX backend, exporting on first use."""
+    path = export_model(model_name, quantize=quantize)
+    tokenizer = AutoTokenizer.from_pretrained(os.path.dirname(path))
+    return OnnxSequenceClassifier(path), tokenizer
+
+
+def parity_check(model_key: str, texts: list = None) -> dict:
+    """
+    Score `texts` with the ONNX model for `model_key` and with the fp32 torch
+    model it was derived from, and report the score deltas.
+    """
+    from .hf_classifier import AVAILABLE_MODELS, LABELS, THRESHOLD_ARRAY, encode_chunks, model_backend, run_batches
+
+    backend, quantize = model_backend(model_key)
+    if backend != "onnx":
+        raise ValueError(f"'{model_key}' does not use the ONNX backend")
+
+    texts = texts or PARITY_SAMPLES
+    model_name = AVAILABLE_MODELS[model_key]
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    reference_model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    reference_model.eval()
+    reference = run_batches(encode_chunks(texts, tokenizer), reference_model, tokenizer)
+
+    onnx_model, onnx_tokenizer = load_onnx_model(model_name, quantize=quantize)
+    candidate = run_batches(encode_chunks(texts, onnx_tokenizer), onnx_model, onnx_tokenizer)
+
+    delta = np.abs(reference - candidate)
+    flips = int(((reference > THRESHOLD_ARRAY) != (candidate > THRESHOLD_ARRAY)).sum())
+
+    return {
+        "model": model_key,
+        "quantized": quantize,
+        "samples": len(texts),
+        "max_abs_delta": round(float(delta.max()), 6),
+        "mean_abs_delta": round(float(delta.mean()), 6),
+        "per_label_max_delta": {label: round(float(d), 6) for label, d in zip(LABELS, delta.max(axis=0))},
+        "threshold_flips": flips,
+    }
+
+
+def main():
+    from .hf_classifier import AVAILABLE_MODELS, ONNX_MODELS
+
+    parser = argparse.ArgumentParser(description="Export and verify ONNX classifier backends")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = sub.add_parser("export", help="export a model key to ONNX")
+    export_cmd.add_argument("model", choices=sorted(k for k in AVAILABLE_MODELS if k not in ONNX_MODELS))
+    export_cmd.add_argument("--int8", action="store_true", help="also write a dynamically quantized copy")
+
+    parity_cmd = sub.add_parser("parity", help="compare ONNX scores against the torch backend")
+    parity_cmd.add_argument("model", help="model key served by ONNX, e.g. deberta-v2-int8")
+
+    args = parser.parse_args()
+    configure_logging()
+    if args.command == "export":
+        print(export_model(AVAILABLE_MODELS[args.model], quantize=args.int8))
+    else:
+        import json
+        print(json.dumps(parity_check(args.model), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# app/core/page_cache.py
+"""
+On-disk HTTP cache for scraped policy pages.
+
+Each URL is stored as two files named by the SHA-256 of the URL: the raw
+response bytes (.html) and a JSON record with the ETag / Last-Modified
+validators, fetch time, the extracted paragraph list and, for a body that was
+cut off while reading, the truncation (re-reported on every use). Within PAGE_CACHE_TTL
+an entry is served without any request; after that it is revalidated with a
+conditional GET, and a 304 reuses the stored paragraphs without re-parsing.
+Entries older than PAGE_CACHE_MAX_AGE are dropped, and the least recently
+fetched entries are evicted once the cache exceeds PAGE_CACHE_MAX_MB.
+The directory is created and scanned on first use, not at import; if it
+can't be written (e.g. a read-only serverless filesystem) the cache turns
+itself off and every page is fetched.
+Outcome counters are kept in total and for the PAGE_CACHE_METRIC_DOMAINS most
+recently seen domains.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE", "1") == "1"
+PAGE_CACHE_DIR = os.getenv(
+    "PAGE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".cache", "pages"),
+)
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", "3600"))
+PAGE_CACHE_MAX_AGE = float(os.getenv("PAGE_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+PAGE_CACHE_MAX_MB = float(os.getenv("PAGE_CACHE_MAX_MB", "256"))
+PAGE_CACHE_METRIC_DOMAINS = int(os.getenv("PAGE_CACHE_METRIC_DOMAINS", "1000"))
+
+
+def _domain(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+class PageCache:
+    def __init__(self, directory: str, ttl: float, max_age: float, max_mb: float,
+                 metric_domains: int = PAGE_CACHE_METRIC_DOMAINS):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._sizes = {}  # digest -> (bytes on disk, fetched_at)
+        self.metric_domains = metric_domains
+        self._totals = {"hit": 0, "revalidated": 0, "miss": 0}
+        self._metrics = OrderedDict()  # domain -> outcome counts, least recently seen first
+        self._opened = False
+        self.enabled = True
+
+    def _open(self) -> bool:
+        """Create and index the cache directory once; False if the cache is off."""
+        if self._opened:
+            return self.enabled
+        with self._lock:
+            if self._opened:
+                return self.enabled
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                for name in os.listdir(self.directory):
+                    if name.endswith(".json"):
+                        digest = name[:-5]
+                        try:
+                            with open(self._meta_path(digest)) as f:
+                                fetched_at = json.load(f)["fetched_at"]
+                            self._sizes[digest] = (self._disk_size(digest), fetched_at)
+                        except (OSError, ValueError, KeyError):
+                            self._remove(digest)
+            except OSError as e:
+                self._disable(e)
+            self._opened = True
+            return self.enabled
+
+    def _disable(self, error: OSError):
+        logger.warning("Page cache disabled", extra={"directory": self.directory, "error": str(error)})
+        self.enabled = False
+        self._sizes.clear()
+
+    def _meta_path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest + ".json")
+
+    def _body_path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest + ".html")
+
+    def _disk_size(self, digest: str) -> int:
+        return sum(os.path.getsize(p) for p in (self._meta_path(digest), self._body_path(digest)) if os.path.exists(p))
+
+    def _remove(self, digest: str):
+        for path in (self._meta_path(digest), self._body_path(digest)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._sizes.pop(digest, None)
+
+    @staticmethod
+    def _digest(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def lookup(self, url: str):
+        """Return the cached record for `url` (without the body) or None."""
+        if not self._open():
+            return None
+        digest = self._digest(url)
+        try:
+            with open(self._meta_path(digest)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry["fetched_at"] > self.max_age:
+            with self._lock:
+                self._remove(digest)
+            return None
+        return entry
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry["fetched_at"] <= self.ttl
+
+    @staticmethod
+    def validators(entry: dict) -> dict:
+        """Conditional-request headers for a cached entry."""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _write_meta(self, digest: str, entry: dict):
+        tmp = self._meta_path(digest) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, self._meta_path(digest))
+
+    def touch(self, url: str, entry: dict, headers=None):
+        """Record a 304: the stored copy is valid for another TTL."""
+        if not self._open():
+            return
+        digest = self._digest(url)
+        entry = dict(entry, fetched_at=time.time())
+        if headers is not None:
+            entry["etag"] = headers.get("ETag") or entry.get("etag")
+            entry["last_modified"] = headers.get("Last-Modified") or entry.get("last_modified")
+        with self._lock:
+            try:
+                self._write_meta(digest, entry)
+            except OSError as e:
+                self._disable(e)
+                return
+            self._sizes[digest] = (self._disk_size(digest), entry["fetched_at"])
+
+    def store(self, url: str, body: bytes, headers, paragraphs: list, truncation: dict = None):
+        if not self._open():
+            return
+        digest = self._digest(url)
+        entry = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "paragraphs": paragraphs,
+            "truncation": truncation,
+        }
+        with self._lock:
+            try:
+                tmp = self._body_path(digest) + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(body)
+                os.replace(tmp, self._body_path(digest))
+                self._write_meta(digest, entry)
+            except OSError as e:
+                self._disable(e)
+                return
+            self._sizes[digest] = (self._disk_size(digest), entry["fetched_at"])
+            self._evict(keep=digest)
+
+    def _evict(self, keep: str):
+        total = sum(size for size, _ in self._sizes.values())
+        if total <= self.max_bytes:
+            return
+        for digest, (size, _) in sorted(self._sizes.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            self._remove(digest)
+            total -= size
+
+    def record(self, url: str, outcome: str):
+        """Count a lookup outcome ("hit", "revalidated" or "miss") in total and for the URL's domain."""
+        domain = _domain(url)
+        with self._lock:
+            self._totals[outcome] += 1
+            counts = self._metrics.get(domain)
+            if counts is None:
+                counts = self._metrics[domain] = {"hit": 0, "revalidated": 0, "miss": 0}
+                if len(self._metrics) > self.metric_domains:
+                    self._metrics.popitem(last=False)
+            self._metrics.move_to_end(domain)
+            counts[outcome] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._sizes),
+                "size_mb": round(sum(size for size, _ in self._sizes.values()) / (1024 * 1024), 2),
+                "outcomes": dict(self._totals),
+                "domains": {domain: dict(counts) for domain, counts in self._metrics.items()},
+            }
+
+
+page_cache = PageCache(PAGE_CACHE_DIR, PAGE_CACHE_TTL, PAGE_CACHE_MAX_AGE, PAGE_CACHE_MAX_MB) if PAGE_CACHE_ENABLED else None
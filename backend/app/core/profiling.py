@@ -0,0 +1,215 @@
+# app/core/profiling.py
+"""
+Opt-in per-request profiling (PROFILING=1, then "profile": true on a request).
+
+A profiled request gets a span tree: graph nodes, and inside them HTTP
+requests and body reads, HTML parsing, tokenization, inference (queue wait
+and forward pass when micro-batched) and LLM calls. Pipeline modules open
+spans with `with span(name, **attrs)`; outside a profiled request that is a
+context-variable lookup and nothing else. The span context follows the
+request into asyncio tasks and stage-executor threads.
+
+Optionally a profile also carries:
+- cpu: a sampled profile (stack snapshots of all threads every
+  PROFILE_SAMPLE_INTERVAL_MS, reported as the hottest stacks and functions)
+- memory: the peak of Python allocations traced with tracemalloc plus the
+  process's max RSS
+Both are process-wide, so concurrent requests show up in them too.
+"""
+
+import contextvars
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILING_ENABLED = os.getenv("PROFILING", "0") == "1"
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_TOP_STACKS = 20
+
+# Leaf frames of threads that are parked, not working
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "base_events.py", "thread.py")
+
+_current = contextvars.ContextVar("profile_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "end", "children")
+
+    def __init__(self, name: str, attrs: dict = None, start: float = None, end: float = None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.start = time.perf_counter() if start is None else start
+        self.end = end
+        self.children = []
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self, origin: float) -> dict:
+        end = self.end if self.end is not None else time.perf_counter()
+        node = {
+            "name": self.name,
+            "start_ms": round(1000 * (self.start - origin), 2),
+            "duration_ms": round(1000 * (end - self.start), 2),
+        }
+        if self.attrs:
+            node["attrs"] = self.attrs
+        if self.children:
+            node["children"] = [child.to_dict(origin) for child in sorted(self.children, key=lambda c: c.start)]
+        return node
+
+
+class _NoSpan:
+    """Yielded by span() outside a profiled request."""
+
+    def set(self, **attrs):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    parent = _current.get()
+    if parent is None:
+        yield _NO_SPAN
+        return
+    child = Span(name, attrs)
+    parent.children.append(child)
+    token = _current.set(child)
+    try:
+        yield child
+    finally:
+        child.end = time.perf_counter()
+        _current.reset(token)
+
+
+def add_span(name: str, start: float, end: float, **attrs):
+    """Attach an already finished span (e.g. measured on another thread) to the current one."""
+    parent = _current.get()
+    if parent is not None:
+        parent.children.append(Span(name, attrs, start, end))
+
+
+class StackSampler(threading.Thread):
+    """Periodically snapshots the stacks of all other threads."""
+
+    def __init__(self, interval_ms: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval_ms / 1000.0
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            self.samples += 1
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident or frame.f_code.co_filename.endswith(IDLE_FILES):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, "thread").rstrip("_0123456789"))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def result(self) -> dict:
+        functions = Counter()
+        for stack, count in self.stacks.items():
+            functions[stack.rsplit(";", 1)[-1]] += count
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            # Folded stacks (root;...;leaf), ready for flamegraph tools
+            "top_stacks": [{"stack": s, "samples": n} for s, n in self.stacks.most_common(PROFILE_TOP_STACKS)],
+            "top_functions": [{"function": f, "samples": n} for f, n in functions.most_common(PROFILE_TOP_STACKS)],
+        }
+
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0:
+            tracemalloc.start()
+        _tracemalloc_users += 1
+        tracemalloc.reset_peak()
+
+
+def _stop_tracemalloc() -> dict:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        current, peak = tracemalloc.get_traced_memory()
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+    result = {"python_peak_mb": round(peak / 2**20, 2), "python_current_mb": round(current / 2**20, 2)}
+    try:
+        import resource
+        # ru_maxrss is in KiB on Linux
+        result["process_max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+    except ImportError:
+        pass
+    return result
+
+
+class Profile:
+    def __init__(self, name: str, cpu: bool = False, memory: bool = False):
+        self.root = Span(name)
+        self.sampler = StackSampler(PROFILE_SAMPLE_INTERVAL_MS) if cpu else None
+        self.memory = memory
+        self.memory_result = None
+
+    def start(self):
+        if self.memory:
+            _start_tracemalloc()
+        if self.sampler is not None:
+            self.sampler.start()
+
+    def stop(self):
+        self.root.end = time.perf_counter()
+        if self.sampler is not None:
+            self.sampler.stop()
+        if self.memory:
+            self.memory_result = _stop_tracemalloc()
+
+    def result(self) -> dict:
+        out = {
+            "total_ms": round(1000 * ((self.root.end or time.perf_counter()) - self.root.start), 2),
+            "spans": self.root.to_dict(self.root.start),
+        }
+        if self.sampler is not None:
+            out["cpu"] = self.sampler.result()
+        if self.memory_result is not None:
+            out["memory"] = self.memory_result
+        return out
+
+
+@contextmanager
+def profiled(name: str, cpu: bool = False, memory: bool = False):
+    """Profile everything run inside the block (including tasks/threads it starts)."""
+    profile = Profile(name, cpu, memory)
+    token = _current.set(profile.root)
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+        _current.reset(token)
@@ -0,0 +1,161 @@
+# app/core/result_cache.py
+"""
+URL-level cache of finished /analyze-url results with single-flight.
+
+Entries are keyed by the normalized URL plus every option that changes the
+result (model key, chunking, score-matrix flag), expire after RESULT_CACHE_TTL
+seconds and are LRU-evicted beyond RESULT_CACHE_MAX_ITEMS. While a key is
+being computed, identical requests await that one execution instead of
+starting their own scrape, inference and LLM calls. force_refresh skips the
+cached entry (it still joins a run that is already in flight, which is fresh
+by definition).
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE", "1") == "1"
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "900"))
+RESULT_CACHE_MAX_ITEMS = int(os.getenv("RESULT_CACHE_MAX_ITEMS", "1000"))
+
+TRACKING_PREFIXES = ("utm_", "mc_")
+TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "ref"}
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a user-supplied URL for cache keys."""
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and str(parts.port) != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PREFIXES) and k.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def result_key(url: str, model: str, **options) -> str:
+    extra = ",".join(f"{k}={options[k]}" for k in sorted(options))
+    return f"{normalize_url(url)}|{model}|{extra}"
+
+
+class ResultCache:
+    def __init__(self, ttl: float, max_items: int):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._items = OrderedDict()  # key -> (stored_at, result)
+        self._inflight = {}          # key -> asyncio.Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            if time.time() - stored_at > self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: str, result: dict):
+        with self._lock:
+            self._items[key] = (time.time(), result)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def inflight(self, key: str):
+        """The future of a running computation for `key`, if any."""
+        return self._inflight.get(key)
+
+    def claim(self, key: str) -> asyncio.Future:
+        """Register the caller as the one computing `key`; it must call release()."""
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        return future
+
+    def release(self, key: str, future: asyncio.Future, result=None, error: BaseException = None, cache: bool = True):
+        """Hand the outcome of a claimed computation to its followers (and the cache)."""
+        self._inflight.pop(key, None)
+        if error is not None and not isinstance(error, Exception):
+            # Cancelled / generator closed: followers take over instead of failing
+            future.cancel()
+        elif error is not None:
+            future.set_exception(error)
+            # Followers receive the exception; mark it retrieved for the leader-only case
+            future.exception()
+        else:
+            future.set_result(result)
+            if cache:
+                self.put(key, result)
+
+    async def join(self, future: asyncio.Future):
+        self.shared += 1
+        # shield: a disconnecting follower must not cancel the leader's run
+        return await asyncio.shield(future)
+
+    async def get_or_compute(self, key: str, compute, force_refresh: bool = False, cacheable=None):
+        """
+        Return (result, source) with source "hit", "shared" or "miss".
+        `compute` is an async callable; its result is stored only if
+        `cacheable(result)` is true (default: always). Exceptions are not cached.
+        """
+        if not force_refresh:
+            result = self.get(key)
+            if result is not None:
+                return result, "hit"
+
+        future = self.inflight(key)
+        while future is not None:
+            try:
+                return await self.join(future), "shared"
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # this request itself was cancelled
+            # The leader was cancelled (e.g. its client went away); take over
+            future = self.inflight(key)
+
+        future = self.claim(key)
+        try:
+            result = await compute()
+        except BaseException as e:
+            self.release(key, future, error=e)
+            raise
+        self.release(key, future, result, cache=cacheable is None or cacheable(result))
+        return result, "miss"
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = len(self._items)
+        return {
+            "entries": entries,
+            "max_items": self.max_items,
+            "ttl": self.ttl,
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "shared": self.shared,
+            "misses": self.misses,
+        }
+
+
+result_cache = ResultCache(RESULT_CACHE_TTL, RESULT_CACHE_MAX_ITEMS) if RESULT_CACHE_ENABLED else None
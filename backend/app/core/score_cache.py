@@ -0,0 +1,129 @@
+# app/core/score_cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+
+def chunk_key(model_key: str, revision: str, text: str) -> str:
+    """Content address of one chunk's scores for a given model revision."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model_key}|{revision}|{digest}"
+
+
+def features_key(model_key: str, revision: str, input_ids: list) -> str:
+    """Content address of a pre-tokenized chunk (e.g. a token window)."""
+    digest = hashlib.sha256(np.asarray(input_ids, dtype=np.int32).tobytes()).hexdigest()
+    return f"{model_key}|{revision}|ids:{digest}"
+
+
+class ScoreCache:
+    """
+    Two-tier cache of per-chunk score vectors: an in-memory LRU in front of a
+    SQLite table. Score rows are float32 arrays, stored as raw bytes.
+
+    The database is opened on first use, not at import. If its directory
+    can't be created or written (e.g. a read-only serverless filesystem) the
+    cache runs memory-only.
+    """
+
+    def __init__(self, path: str, memory_items: int = 20000):
+        self.memory_items = memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.path = path
+        self._db = None
+        self._opened = not path
+
+    def _open(self):
+        """Open the SQLite tier once (called with the lock held)."""
+        if self._opened:
+            return self._db
+        self._opened = True
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, scores BLOB NOT NULL)")
+            db.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Score cache is memory-only", extra={"path": self.path, "error": str(e)})
+            return None
+        self._db = db
+        return db
+
+    def _remember(self, key: str, scores: np.ndarray):
+        self._memory[key] = scores
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: list) -> dict:
+        """Return {key: scores} for every key found in either tier."""
+        found = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                scores = self._memory.get(key)
+                if scores is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = scores
+                    self.memory_hits += 1
+                else:
+                    missing.append(key)
+
+            if missing and self._open() is not None:
+                unique = list(dict.fromkeys(missing))
+                # Stay under SQLite's bound-parameter limit
+                for start in range(0, len(unique), 500):
+                    part = unique[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, scores FROM scores WHERE key IN ({','.join('?' * len(part))})", part
+                    ).fetchall()
+                    for key, blob in rows:
+                        scores = np.frombuffer(blob, dtype=np.float32)
+                        found[key] = scores
+                        self._remember(key, scores)
+                self.disk_hits += sum(1 for key in missing if key in found)
+
+            self.misses += sum(1 for key in missing if key not in found)
+        return found
+
+    def put_many(self, items: dict):
+        if not items:
+            return
+        with self._lock:
+            for key, scores in items.items():
+                self._remember(key, scores)
+            if self._open() is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO scores (key, scores) VALUES (?, ?)",
+                    [(key, np.asarray(scores, dtype=np.float32).tobytes()) for key, scores in items.items()],
+                )
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memory_items": len(self._memory),
+                "disk": self._db is not None,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0,
+            }
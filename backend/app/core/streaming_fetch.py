@@ -0,0 +1,183 @@
+# app/core/streaming_fetch.py
+"""
+Guarded body reading for scraped pages.
+
+Responses are streamed instead of buffered: the Content-Type is checked before
+any of the body is read, the body is decoded incrementally and reading stops
+at SCRAPE_MAX_BYTES, or earlier once SCRAPE_MAX_TEXT_CHARS of paragraph text
+has arrived (measured with an lxml pull parser when lxml is installed).
+A truncated body is still parsed; the HTML parsers are tolerant of a cut-off
+document.
+
+Fetches that were rejected or truncated are recorded in the current
+collect_fetch_issues() list so callers can report them in their response.
+A truncation is also returned with the body, so that the page cache can keep
+it and report it again whenever the truncated copy is served.
+"""
+
+import codecs
+import contextvars
+import os
+import re
+
+from .log import get_logger
+from .profiling import span
+
+logger = get_logger(__name__)
+
+SCRAPE_MAX_BYTES = int(float(os.getenv("SCRAPE_MAX_MB", "5")) * 1024 * 1024)
+SCRAPE_MAX_TEXT_CHARS = int(os.getenv("SCRAPE_MAX_TEXT_CHARS", "200000"))
+ALLOWED_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+READ_CHUNK_SIZE = 64 * 1024
+
+META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([a-zA-Z0-9_-]+)""", re.I)
+HEADER_CHARSET = re.compile(r"charset=[\"']?([a-zA-Z0-9_-]+)", re.I)
+TEXT_TAGS = ("p", "li", "td", "dd", "blockquote")
+
+_fetch_issues = contextvars.ContextVar("fetch_issues", default=None)
+
+
+class FetchRejected(Exception):
+    """Raised when a response is not worth reading (e.g. a binary content type)."""
+
+    def __init__(self, url: str, reason: str):
+        super().__init__(f"Rejected {url}: {reason}")
+        self.url = url
+        self.reason = reason
+
+
+def collect_fetch_issues() -> list:
+    """Start collecting fetch issues in the current context and return the (live) list."""
+    issues = []
+    _fetch_issues.set(issues)
+    return issues
+
+
+def record_fetch_issue(url: str, status: str, reason: str, bytes_read: int = 0):
+    issue = {"url": url, "status": status, "reason": reason, "bytes": bytes_read}
+    logger.warning("Fetch %s", status, extra=issue)
+    issues = _fetch_issues.get()
+    if issues is not None:
+        issues.append(issue)
+    return issue
+
+
+def check_content_type(url: str, headers):
+    content_type = (headers.get("Content-Type") or "").split(";", 1)[0].strip().lower()
+    # A missing Content-Type is tolerated; many small sites omit it
+    if content_type and content_type not in ALLOWED_CONTENT_TYPES:
+        record_fetch_issue(url, "rejected", f"content type {content_type}")
+        raise FetchRejected(url, f"content type {content_type}")
+
+
+class _TextMeter:
+    """Incrementally parses HTML and measures the text of paragraph-like elements."""
+
+    def __init__(self):
+        self.chars = 0
+        try:
+            from lxml import etree
+        except ImportError:
+            self.parser = None
+            return
+        self.parser = etree.HTMLPullParser(events=("end",), tag=TEXT_TAGS)
+
+    def feed(self, data: bytes) -> int:
+        if self.parser is None:
+            return 0
+        self.parser.feed(data)
+        for _, el in self.parser.read_events():
+            self.chars += len(" ".join(el.itertext()).strip())
+        return self.chars
+
+
+class BodyReader:
+    """
+    Accumulates a streamed body. feed() returns False once reading should stop;
+    `truncated` then says why ("max_bytes" or "text_limit").
+    """
+
+    def __init__(self, url: str, headers):
+        self.url = url
+        self.header_charset = None
+        match = HEADER_CHARSET.search(headers.get("Content-Type") or "")
+        if match:
+            self.header_charset = match.group(1)
+        self.raw = []
+        self.bytes_read = 0
+        self.truncated = None
+        self.decoder = None
+        self.text_parts = []
+        self.meter = _TextMeter()
+
+    def _start_decoder(self, head: bytes):
+        encoding = self.header_charset
+        if not encoding:
+            match = META_CHARSET.search(head[:4096])
+            encoding = match.group(1).decode("ascii") if match else "utf-8"
+        try:
+            self.decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        except LookupError:
+            self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, chunk: bytes) -> bool:
+        if not chunk:
+            return True
+        room = SCRAPE_MAX_BYTES - self.bytes_read
+        # Truncated only once a byte past the cap arrives: a body of exactly
+        # SCRAPE_MAX_BYTES is complete
+        if len(chunk) > room:
+            chunk = chunk[:room]
+            self.truncated = "max_bytes"
+        if self.decoder is None:
+            self._start_decoder(chunk)
+
+        self.raw.append(chunk)
+        self.bytes_read += len(chunk)
+        self.text_parts.append(self.decoder.decode(chunk))
+        if not self.truncated and self.meter.feed(chunk) >= SCRAPE_MAX_TEXT_CHARS:
+            self.truncated = "text_limit"
+        return self.truncated is None
+
+    def finish(self):
+        """
+        Return (text, raw bytes, truncation), recording the truncation issue if
+        one happened (truncation is then {"reason": ..., "bytes": ...}, else None).
+        """
+        if self.decoder is not None:
+            self.text_parts.append(self.decoder.decode(b"", final=True))
+        truncation = None
+        if self.truncated:
+            record_fetch_issue(self.url, "truncated", self.truncated, self.bytes_read)
+            truncation = {"reason": self.truncated, "bytes": self.bytes_read}
+        return "".join(self.text_parts), b"".join(self.raw), truncation
+
+
+def read_body(url: str, res):
+    """Stream a `requests` response (opened with stream=True) through a BodyReader."""
+    try:
+        check_content_type(url, res.headers)
+        reader = BodyReader(url, res.headers)
+        with span("http_body", url=url) as s:
+            for chunk in res.iter_content(READ_CHUNK_SIZE):
+                if not reader.feed(chunk):
+                    break
+            s.set(bytes=reader.bytes_read, truncated=reader.truncated)
+        return reader.finish()
+    finally:
+        res.close()
+
+
+async def read_body_async(url: str, res):
+    """Stream an httpx response (sent with stream=True) through a BodyReader."""
+    try:
+        check_content_type(url, res.headers)
+        reader = BodyReader(url, res.headers)
+        with span("http_body", url=url) as s:
+            async for chunk in res.aiter_bytes(READ_CHUNK_SIZE):
+                if not reader.feed(chunk):
+                    break
+            s.set(bytes=reader.bytes_read, truncated=reader.truncated)
+        return reader.finish()
+    finally:
+        await res.aclose()
@@ -0,0 +1,76 @@
+# app/core/warmup.py
+"""
+Startup warm-up of the heavy subsystems.
+
+Importing the API no longer imports torch/transformers, LangGraph, the
+LangChain/Groq modules or the scrapers, and the analysis graph is compiled on
+first use, so a cold process (serverless, a new autoscaled replica) answers
+/health and /models right away. At startup the registered steps load those
+subsystems anyway, so that normally the first analysis finds them ready:
+
+- STARTUP_WARMUP=background (default): steps run in a thread while the
+  server already accepts requests
+- blocking: steps run before the server accepts requests
+- off: everything loads on first use
+
+Steps registered with before_serving=True (forking inference workers, which
+must not happen while request threads are running) always run inline first.
+A failing step is logged and recorded; the subsystem then loads on first use.
+"""
+
+import os
+import threading
+import time
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background")
+
+
+class Warmup:
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.status = "pending"  # pending | running | done | failed | off
+        self._steps = []         # (name, fn, before_serving)
+        self._results = {}       # name -> {"seconds": ..., "error": ...}
+        self._thread = None
+
+    def add_step(self, name: str, fn, before_serving: bool = False):
+        self._steps.append((name, fn, before_serving))
+
+    def _run_step(self, name: str, fn):
+        started = time.perf_counter()
+        try:
+            fn()
+            self._results[name] = {"seconds": round(time.perf_counter() - started, 3)}
+        except Exception as e:
+            self._results[name] = {"seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+            logger.exception("Warm-up step failed", extra={"step": name})
+
+    def _run(self, steps: list):
+        for name, fn, _ in steps:
+            self._run_step(name, fn)
+        self.status = "failed" if any("error" in r for r in self._results.values()) else "done"
+        logger.info("Warm-up finished", extra={"status": self.status, "steps": self._results})
+
+    def start(self):
+        inline = [step for step in self._steps if step[2]]
+        deferred = [step for step in self._steps if not step[2]]
+        self.status = "running"
+        for name, fn, _ in inline:
+            self._run_step(name, fn)
+        if self.mode == "off":
+            self.status = "off"
+        elif self.mode == "blocking":
+            self._run(deferred)
+        else:
+            self._thread = threading.Thread(target=self._run, args=(deferred,), name="warmup", daemon=True)
+            self._thread.start()
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "status": self.status, "steps": dict(self._results)}
+
+
+warmup = Warmup(STARTUP_WARMUP)
@@ -1,34 +1,87 @@
 # app/core/web_scraper.py
+import contextvars
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-def find_terms_url(base_url):
-    """
-    Find likely Terms & Conditions or Privacy Policy link.
-    """
-    if not base_url.startswith("http"):
-        base_url = "https://" + base_url
+from .html_extract import extract_paragraphs
+from .link_discovery import DISCOVERY_DEADLINE, CandidateSelector, candidate_urls
+from .page_cache import page_cache
+from .streaming_fetch import read_body, record_fetch_issue
+from .log import get_logger
+from .profiling import span
 
-    try:
-        res = requests.get(base_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-        res.raise_for_status()
-        soup = BeautifulSoup(res.text, "html.parser")
+logger = get_logger(__name__)
 
-        links = [urljoin(base_url, a["href"]) for a in soup.find_all("a", href=True)]
-        patterns = ["terms", "condition", "privacy", "policy", "legal"]
+# Shared with app.core.async_scraper
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+MOBILE_USER_AGENT = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
+POLICY_KEYWORDS = ["terms", "privacy", "policy", "condition", "legal"]
+
+
+def normalize_url(url):
+    return url if url.startswith("http") else "https://" + url
 
-        for link in links:
-            if any(re.search(p, link, re.I) for p in patterns):
-                return link
-        return None
 
+def is_direct_policy_url(url):
+    lower_url = url.lower()
+    return any(x in lower_url for x in POLICY_KEYWORDS)
+
+
+def fetch_landing_page(base_url):
+    """Fetch the page policy links are discovered from; None on failure."""
+    try:
+        res = requests.get(base_url, headers=BROWSER_HEADERS, timeout=10, stream=True)
+        if not res.ok:
+            res.close()
+        res.raise_for_status()
+        return read_body(base_url, res)[0]
     except Exception as e:
-        print(f"[ERROR] Could not fetch links: {e}")
+        logger.error("Could not fetch links", extra={"url": base_url, "error": str(e)})
         return None
 
 
+def discover_policy(base_url, html):
+    """
+    Probe the top-ranked links from `html` and common policy paths concurrently
+    and return (url, paragraphs) of the most policy-like page, or (None, []).
+    """
+    candidates = candidate_urls(html, base_url)
+    if not candidates:
+        return None, []
+    logger.debug("Probing policy candidates", extra={"candidates": candidates})
+
+    selector = CandidateSelector(candidates)
+    deadline = time.monotonic() + DISCOVERY_DEADLINE
+    pool = ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix="policy-probe")
+    pending = {pool.submit(contextvars.copy_context().run, extract_paragraphs_from_url, url): url for url in candidates}
+    try:
+        while pending and not selector.done():
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                logger.warning("Discovery deadline reached", extra={"outstanding": len(pending)})
+                break
+            finished, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in finished:
+                selector.add(pending.pop(future), future.result())
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return selector.best()
+
+
+def cached_paragraphs(url, entry, outcome):
+    """Serve a page-cache entry: count the outcome and re-report a stored truncation."""
+    page_cache.record(url, outcome)
+    truncation = entry.get("truncation")
+    if truncation:
+        record_fetch_issue(url, "truncated", truncation["reason"], truncation["bytes"])
+    return entry["paragraphs"]
+
+
 def extract_paragraphs_from_url(url):
     """
     Return a list of paragraph-like text blocks from a webpage.
@@ -36,128 +89,101 @@ def extract_paragraphs_from_url(url):
     text by two or more newlines or by sentences if necessary.
     """
     try:
-        print(f"DEBUG: Fetching {url}...")
+        cached = page_cache.lookup(url) if page_cache else None
+        if cached and page_cache.is_fresh(cached):
+            logger.debug("Page cache hit", extra={"url": url})
+            return cached_paragraphs(url, cached, "hit")
+
+        logger.debug("Fetching", extra={"url": url})
         # Use a more modern and generic User-Agent
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.9",
-        }
-        res = requests.get(url, headers=headers, timeout=15)
-        print(f"DEBUG: Status Code: {res.status_code}")
+        headers = dict(BROWSER_HEADERS)
+        # Revalidate a stale copy with If-None-Match / If-Modified-Since
+        validators = page_cache.validators(cached) if cached else {}
+        with span("http_request", url=url) as s:
+            res = requests.get(url, headers={**headers, **validators}, timeout=15, stream=True)
+            s.set(status=res.status_code)
+        logger.debug("Fetched", extra={"url": url, "status": res.status_code})
+
+        if res.status_code == 304 and cached:
+            res.close()
+            page_cache.touch(url, cached, res.headers)
+            return cached_paragraphs(url, cached, "revalidated")
         
         if res.status_code in [403, 401]:
-            print(f"❌ Access Denied (Status {res.status_code}). The website might be blocking scrapers.")
+            logger.warning("Access denied, the website might be blocking scrapers", extra={"url": url, "status": res.status_code})
+            res.close()
             # Try one more time with a different user agent (mobile)
-            headers["User-Agent"] = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
-            print("🔄 Retrying with mobile User-Agent...")
-            res = requests.get(url, headers=headers, timeout=15)
+            headers["User-Agent"] = MOBILE_USER_AGENT
+            logger.info("Retrying with mobile User-Agent", extra={"url": url})
+            with span("http_request", url=url, user_agent="mobile") as s:
+                res = requests.get(url, headers=headers, timeout=15, stream=True)
+                s.set(status=res.status_code)
             if res.status_code in [403, 401]:
+                 res.close()
                  return []
             
+        if not res.ok:
+            res.close()
         res.raise_for_status()
-        soup = BeautifulSoup(res.text, "html.parser")
-
-        # Aggressive cleanup of non-content
-        for tag in soup(["script", "style", "nav", "footer", "header", "aside", "noscript", "iframe", "svg", "button", "input", "form"]):
-            tag.decompose()
-
-        paragraphs = []
-
-        # Strategy 1: Look for specific privacy policy containers first
-        content_divs = soup.find_all("div", class_=re.compile(r"privacy|policy|terms|legal|content|article|main", re.I))
-        if content_divs:
-            for div in content_divs:
-                # Extract text from these specific divs
-                texts = [t.strip() for t in div.stripped_strings if len(t.strip()) > 30]
-                paragraphs.extend(texts)
-
-        # Strategy 2: Standard <p> tags if Strategy 1 yielded little
-        if len(paragraphs) < 5:
-            for p in soup.find_all("p"):
-                text = " ".join(p.stripped_strings)
-                if text and len(text) > 30: # Filter out tiny captions
-                    paragraphs.append(text)
-
-        # Strategy 3: Generic div/section text if still empty
-        if not paragraphs:
-            for tag_name in ("div", "section", "article", "li"):
-                for tag in soup.find_all(tag_name):
-                    text = " ".join(tag.stripped_strings)
-                    if text and len(text.split()) > 15:  # moderate length
-                        paragraphs.append(text)
-
-        # Strategy 4: The "Nuclear Option" - just get all text and split by newlines
-        if not paragraphs:
-            print("⚠ Parsing fallback: Extracting all visible text.")
-            visible = "\n".join(soup.stripped_strings)
-            # Split by double newlines to preserve some paragraph structure
-            raw_pars = [p.strip() for p in re.split(r"\n{2,}", visible) if len(p.strip()) > 40]
-            paragraphs = raw_pars
-
-        # Deduplicate while preserving order
-        seen = set()
-        unique_paragraphs = []
-        for p in paragraphs:
-            if p not in seen:
-                seen.add(p)
-                unique_paragraphs.append(p)
-
-        return unique_paragraphs
+        # Streamed with a size cap and content-type check instead of buffering res.text
+        html, body, truncation = read_body(url, res)
+        paragraphs = parse_paragraphs(html)
+        if page_cache:
+            page_cache.store(url, body, res.headers, paragraphs, truncation)
+            page_cache.record(url, "miss")
+        return paragraphs
     except Exception as e:
-        print(f"[ERROR] Could not extract paragraphs: {e}")
+        logger.error("Could not extract paragraphs", extra={"url": url, "error": str(e)})
         return []
 
 
+def parse_paragraphs(html):
+    """
+    Extract de-duplicated paragraph-like text blocks from an HTML document
+    using the backend selected by HTML_EXTRACTOR (see app.core.html_extract).
+    """
+    return extract_paragraphs(html)
+
+
 def get_terms_text(base_url):
     """
     Main function — find and extract T&C text with paragraphs separated.
     Handles both direct policy links and base URLs by searching for links.
     """
     # 1. Check if the provided URL looks like a policy itself or if user wants direct access
-    lower_url = base_url.lower()
-    is_direct_candidate = any(x in lower_url for x in ["terms", "privacy", "policy", "condition", "legal"])
-    
-    terms_url = None
-    paragraphs = []
+    is_direct_candidate = is_direct_policy_url(base_url)
 
     if is_direct_candidate:
-        print(f"ℹ URL looks like a direct policy link: {base_url}")
-        target_url = base_url if base_url.startswith("http") else "https://" + base_url
+        logger.info("URL looks like a direct policy link", extra={"url": base_url})
+        target_url = normalize_url(base_url)
         paragraphs = extract_paragraphs_from_url(target_url)
         if paragraphs and len(paragraphs) > 2: # Heuristic: if we got meaningful content
-            terms_url = target_url
-            print(f"✅ Successfully scraped direct link: {terms_url}")
-            return terms_url, paragraphs
+            logger.info("Scraped direct policy link", extra={"url": target_url})
+            return target_url, paragraphs
         else:
-            print("⚠ Direct link scrape yielded insufficient data. Trying to find sub-links...")
+            logger.info("Direct link yielded too little text, looking for policy links", extra={"url": base_url})
 
-    # 2. If not direct or direct failed, try to find a link from the base URL
-    if not terms_url:
-        terms_url = find_terms_url(base_url)
-    
-    # 3. If found via search, scrape it
+    # 2. If not direct or direct failed, rank the links on the base page and
+    #    probe the best candidates (plus common policy paths) in parallel
+    base_html = fetch_landing_page(normalize_url(base_url))
+    terms_url, paragraphs = discover_policy(normalize_url(base_url), base_html)
     if terms_url:
-        print(f"✅ Found policy link: {terms_url}")
-        paragraphs = extract_paragraphs_from_url(terms_url)
-    else:
-        # Fallback: maybe the base URL *was* the content but didn't match keywords?
-        # Only try if we haven't tried it as a direct candidate yet
-        if not is_direct_candidate:
-           print("⚠ No specific policy link found. Attempting to scrape the base URL as a fallback...")
-           target_url = base_url if base_url.startswith("http") else "https://" + base_url
-           paragraphs = extract_paragraphs_from_url(target_url)
-           if paragraphs:
-               terms_url = target_url
-               print(f"✅ Scraped content from base URL: {terms_url}")
-           else:
-               print("❌ No content found on base URL either.")
-    
-    if not terms_url:
-        print("⚠ No terms page or content found.")
-        return None, []
-
-    return terms_url, paragraphs
+        logger.info("Found policy link", extra={"url": terms_url})
+        return terms_url, paragraphs
+
+    # 3. Fallback: maybe the base URL *was* the content but didn't match keywords?
+    # Only try if we haven't tried it as a direct candidate yet
+    if not is_direct_candidate:
+        logger.info("No policy link found, falling back to the base URL", extra={"url": base_url})
+        target_url = normalize_url(base_url)
+        paragraphs = parse_paragraphs(base_html) if base_html else extract_paragraphs_from_url(target_url)
+        if paragraphs:
+            logger.info("Scraped content from the base URL", extra={"url": target_url})
+            return target_url, paragraphs
+        logger.warning("No content found on the base URL either", extra={"url": base_url})
+
+    logger.warning("No terms page or content found", extra={"url": base_url})
+    return None, []
 
 # Adapter for Lang Graph
 def scrape_policy(url: str) -> str:
@@ -165,7 +191,7 @@ def scrape_policy(url: str) -> str:
     Scrapes the privacy policy from the given URL.
     Returns the combined text of the policy.
     """
-    print(f"DEBUG: app.core.web_scraper calling get_terms_text for {url}")
+    logger.debug("get_terms_text", extra={"url": url})
     terms_url, paragraphs = get_terms_text(url)
     
     if not paragraphs:
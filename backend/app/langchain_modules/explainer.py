@@ -3,9 +3,7 @@
 from .llm import get_llm
 from .prompts import LABEL_EXPLANATION_PROMPT
 
-def explain(state: dict) -> str:
-    llm = get_llm()
-
+def _explanation_inputs(state: dict) -> dict:
     labels = state.get("labels", [])
     relevant_chunks = state.get("relevant_chunks", {})
     
@@ -33,11 +31,19 @@ def explain(state: dict) -> str:
         context_parts.append(f"- **{label}** (Risk: {risk}): \"{chunk_text}...\"")
     
     context_map = "\n".join(context_parts)
+    return {"context_map": context_map}
+
+def explain(state: dict) -> str:
+    llm = get_llm()
 
     chain = LABEL_EXPLANATION_PROMPT | llm
 
-    response = chain.invoke({
-        "context_map": context_map
-    })
+    response = chain.invoke(_explanation_inputs(state))
+
+    return response.content
 
+async def aexplain(state: dict) -> str:
+    """Async explain(); inside a LangGraph node its tokens show up in astream(stream_mode="messages")."""
+    chain = LABEL_EXPLANATION_PROMPT | get_llm()
+    response = await chain.ainvoke(_explanation_inputs(state))
     return response.content
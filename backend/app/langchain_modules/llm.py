@@ -1,11 +1,56 @@
 # app/langchain_modules/llm.py
 
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_groq import ChatGroq
 import os
+import time
+
+from app.core.metrics import llm_calls, llm_tokens
+from app.core.profiling import add_span
+
+
+class LLMUsageCallback(BaseCallbackHandler):
+    """
+    Counts calls and prompt/completion tokens per LangGraph node ("none"
+    outside the graph) and adds an llm_call span to profiled requests.
+    """
+
+    run_inline = True  # plain dict bookkeeping; no need for a thread hop in async runs
+
+    def __init__(self):
+        self._runs = {}  # run_id -> (node name, start time)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._runs[run_id] = ((metadata or {}).get("langgraph_node", "none"), time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        node, started = self._runs.pop(run_id, ("none", None))
+        llm_calls.inc(node=node)
+        prompt = completion = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+        if not (prompt or completion):
+            # Older integrations only report usage in llm_output
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt, completion = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        llm_tokens.inc(prompt, node=node, kind="prompt")
+        llm_tokens.inc(completion, node=node, kind="completion")
+        if started is not None:
+            add_span("llm_call", started, time.perf_counter(), prompt_tokens=prompt, completion_tokens=completion)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._runs.pop(run_id, None)
+
+
+llm_usage = LLMUsageCallback()
 
 def get_llm():
     return ChatGroq(
         model="llama-3.1-8b-instant",
         temperature=0,
         max_tokens=1024,
+        callbacks=[llm_usage],
     )
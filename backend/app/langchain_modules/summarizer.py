@@ -3,19 +3,25 @@
 from .llm import get_llm
 from .prompts import SUMMARY_PROMPT
 
-def summarize(state: dict) -> str:
-    llm = get_llm()
-
+def _summary_inputs(state: dict) -> dict:
     full_text = "\n".join(state.get("chunks", []))
     
     # Take a significant portion but stay within reasonable context limits
     # 15,000 characters is usually enough for a high-quality summary and metadata extraction.
     truncated_text = full_text[:15000]
+    return {"policy_text": truncated_text}
+
+def summarize(state: dict) -> str:
+    llm = get_llm()
 
     chain = SUMMARY_PROMPT | llm
 
-    response = chain.invoke({
-        "policy_text": truncated_text
-    })
+    response = chain.invoke(_summary_inputs(state))
+
+    return response.content
 
+async def asummarize(state: dict) -> str:
+    """Async summarize(); tokens stream through LangGraph's "messages" mode."""
+    chain = SUMMARY_PROMPT | get_llm()
+    response = await chain.ainvoke(_summary_inputs(state))
     return response.content
@@ -1,8 +1,13 @@
 # app/langgraph/graph.py
 
+import threading
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 
-from .state import PolicyState
+from app.core.metrics import timed_node
+
+from .state import LLM_STAGES, PolicyState
 from .nodes import (
     scrape_node,
     chunk_node,
@@ -14,6 +19,11 @@ from .nodes import (
     instruction_node,
     guardrail_node,
     chat_response_node,
+    ascrape_node,
+    achunk_node,
+    aclassify_node,
+    aexplain_node,
+    asummary_node,
 )
 
 # --- Routers ---
@@ -30,6 +40,15 @@ def master_router(state: PolicyState):
     else:
         return "end" # Invalid input
 
+def llm_router(state: PolicyState):
+    """
+    Fan out to the LLM stages the request asked for (all by default). They run
+    concurrently in one superstep; none requested ends the run after classify.
+    """
+    include = state.get("include")
+    stages = [stage for stage in LLM_STAGES if include is None or stage in include]
+    return stages or END
+
 def chat_router(state: PolicyState):
     intent = state.get("intent")
     if intent == "INSTRUCTION":
@@ -40,22 +59,27 @@ def chat_router(state: PolicyState):
         return "guardrail"
 
 
+def analysis_node(name: str, func, afunc):
+    """Sync functions serve invoke(); the async variants serve ainvoke()/astream(). Both are timed."""
+    return RunnableLambda(timed_node(name, func), afunc=timed_node(name, afunc), name=name)
+
+
 def build_policy_graph():
     graph = StateGraph(PolicyState)
 
     # --- Analysis Nodes ---
-    graph.add_node("scrape", scrape_node)
-    graph.add_node("chunk", chunk_node)
-    graph.add_node("classify", classify_node)
-    graph.add_node("explain", explain_node)
-    graph.add_node("summary", summary_node)
+    graph.add_node("scrape", analysis_node("scrape", scrape_node, ascrape_node))
+    graph.add_node("chunk", analysis_node("chunk", chunk_node, achunk_node))
+    graph.add_node("classify", analysis_node("classify", classify_node, aclassify_node))
+    graph.add_node("explain", analysis_node("explain", explain_node, aexplain_node))
+    graph.add_node("summary", analysis_node("summary", summary_node, asummary_node))
 
     # --- Chatbot Nodes ---
-    graph.add_node("detect_intent", intent_node)
-    graph.add_node("rag", rag_node)
-    graph.add_node("instruction", instruction_node)
-    graph.add_node("guardrail", guardrail_node)
-    graph.add_node("format_chat", chat_response_node)
+    graph.add_node("detect_intent", timed_node("detect_intent", intent_node))
+    graph.add_node("rag", timed_node("rag", rag_node))
+    graph.add_node("instruction", timed_node("instruction", instruction_node))
+    graph.add_node("guardrail", timed_node("guardrail", guardrail_node))
+    graph.add_node("format_chat", timed_node("format_chat", chat_response_node))
 
     # --- Entry Point (Virtual) ---
     # We use a dummy starting node or just conditional entry.
@@ -75,9 +99,9 @@ def build_policy_graph():
     # --- Analysis Flow ---
     graph.add_edge("scrape", "chunk")
     graph.add_edge("chunk", "classify")
-    graph.add_edge("classify", "explain")
-    graph.add_edge("explain", "summary")
-    graph.add_edge("summary", END)
+    graph.add_conditional_edges("classify", llm_router, [*LLM_STAGES, END])
+    for stage in LLM_STAGES:
+        graph.add_edge(stage, END)
 
     # --- Chatbot Flow ---
     graph.add_conditional_edges(
@@ -98,4 +122,14 @@ def build_policy_graph():
     return graph.compile()
 
 
-policy_graph = build_policy_graph()
+_policy_graph = None
+_policy_graph_lock = threading.Lock()
+
+def get_policy_graph():
+    """The compiled graph, built on first use (not at import) and shared afterwards."""
+    global _policy_graph
+    if _policy_graph is None:
+        with _policy_graph_lock:
+            if _policy_graph is None:
+                _policy_graph = build_policy_graph()
+    return _policy_graph
@@ -1,11 +1,14 @@
 # app/langgraph/nodes.py
 
-from app.core.web_scraper import scrape_policy
-from app.core.chunk_processor import chunk_text
-from app.core.hf_classifier import classify_chunks
+from app.core.web_scraper import get_terms_text
+from app.core.async_scraper import get_terms_text_async
+from app.core.streaming_fetch import collect_fetch_issues
+from app.core.chunk_processor import chunk_text_for_model
+from app.core.hf_classifier import DEFAULT_MODEL, classify_chunks
+from app.core.executors import compute_executor, io_executor
 
-from app.langchain_modules.explainer import explain
-from app.langchain_modules.summarizer import summarize
+from app.langchain_modules.explainer import aexplain, explain
+from app.langchain_modules.summarizer import asummarize, summarize
 
 from app.chatbot.intent_router import detect_intent
 from app.chatbot.rag_handler import handle_rag_query
@@ -14,28 +17,85 @@ from app.chatbot.guardrails import handle_off_topic
 
 
 def scrape_node(state: dict) -> dict:
-    text = scrape_policy(state["url"])
-    return {**state, "raw_text": text}
+    issues = collect_fetch_issues()
+    policy_url, paragraphs = get_terms_text(state["url"])
+    text = "\n\n".join(paragraphs)
+    return {**state, "raw_text": text, "policy_url": policy_url, "fetch_issues": issues}
 
 
 def chunk_node(state: dict) -> dict:
-    chunks = chunk_text(state["raw_text"])
-    return {**state, "chunks": chunks}
+    # Chunking and inference run on the compute stage, not the graph's thread
+    chunks, features = compute_executor.run_sync(
+        chunk_text_for_model, state["raw_text"], state.get("model") or DEFAULT_MODEL, state.get("chunking")
+    )
+    return {**state, "chunks": chunks, "chunk_features": features}
 
 
 def classify_node(state: dict) -> dict:
-    result = classify_chunks(state["chunks"])
+    result = compute_executor.run_sync(
+        classify_chunks,
+        state["chunks"],
+        model_name=state.get("model") or DEFAULT_MODEL,
+        include_score_matrix=state.get("include_score_matrix", False),
+        features=state.get("chunk_features"),
+    )
     return {**state, **result}
 
 
+# The LLM stages run concurrently after classify, so they return only the key
+# they own: a full-state update from two branches in the same step would clash.
+
 def explain_node(state: dict) -> dict:
     explanation = explain(state)
-    return {**state, "explanation": explanation}
+    return {"explanation": explanation}
 
 
 def summary_node(state: dict) -> dict:
     summary = summarize(state)
-    return {**state, "summary": summary}
+    return {"summary": summary}
+
+
+# --- Async variants (used by policy_graph.ainvoke / astream) ---
+# Network I/O is awaited directly; blocking work goes to the bounded executors.
+
+async def ascrape_node(state: dict) -> dict:
+    issues = collect_fetch_issues()
+    policy_url, paragraphs = await get_terms_text_async(state["url"])
+    text = "\n\n".join(paragraphs)
+    return {**state, "raw_text": text, "policy_url": policy_url, "fetch_issues": issues}
+
+
+async def achunk_node(state: dict) -> dict:
+    chunks, features = await compute_executor.run(
+        chunk_text_for_model, state["raw_text"], state.get("model") or DEFAULT_MODEL, state.get("chunking")
+    )
+    return {**state, "chunks": chunks, "chunk_features": features}
+
+
+async def aclassify_node(state: dict) -> dict:
+    result = await compute_executor.run(
+        classify_chunks,
+        state["chunks"],
+        model_name=state.get("model") or DEFAULT_MODEL,
+        include_score_matrix=state.get("include_score_matrix", False),
+        features=state.get("chunk_features"),
+    )
+    return {**state, **result}
+
+
+# The LLM calls are awaited natively (not on an io thread) so the graph's
+# callbacks see them and astream(stream_mode="messages") yields their tokens.
+
+async def aexplain_node(state: dict) -> dict:
+    async with io_executor.slot():
+        explanation = await aexplain(state)
+    return {"explanation": explanation}
+
+
+async def asummary_node(state: dict) -> dict:
+    async with io_executor.slot():
+        summary = await asummarize(state)
+    return {"summary": summary}
 
 from app.chatbot.response_builder import build_response
 
@@ -1,15 +1,31 @@
 # app/langgraph/state.py
 
-from typing import TypedDict, List, Dict
+from typing import TypedDict, List, Dict, Optional
 
+# Independent LLM stages that follow classification (graph node names)
+LLM_STAGES = ("explain", "summary")
+
+# No key needs an Annotated reducer: the LLM_STAGES branches run in the same superstep,
+# but each returns only its own key ("explanation" / "summary"), so no channel is written twice.
 class PolicyState(TypedDict):
     # Analysis Fields
     url: str
+    model: str
+    include_score_matrix: bool
+    chunking: Optional[str]
+    include: Optional[List[str]]  # LLM stages to run after classify ("explain", "summary"); None = all
+    policy_url: Optional[str]  # the page the policy text was scraped from
     raw_text: str
+    fetch_issues: List[Dict]  # rejected / truncated page fetches during scraping
     chunks: List[str]
+    chunk_features: Optional[List[Dict]]  # pre-tokenized windows ("tokens" chunking)
     labels: List[str]
     scores: List[Dict]
     risk_levels: List[str]
+    risks: List[str]
+    risk_percentage: Dict
+    score_matrix: Dict
+    cascade: Dict
     relevant_chunks: Dict
     explanation: str
     summary: str
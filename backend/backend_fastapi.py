@@ -1,21 +1,54 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import List, Literal, Optional
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipMiddleware
 from dotenv import load_dotenv
+from contextlib import nullcontext
+import asyncio
 import os
+import time
 from fastapi import HTTPException
 
 
-from app.langchain_modules.summarizer import summarize
-from app.langchain_modules.explainer import explain
-from app.langgraph.graph import policy_graph
-from app.core.hf_classifier import AVAILABLE_MODELS, DEFAULT_MODEL, classify_chunks
-from app.core.chunk_processor import chunk_text
+# Kept light on purpose (cold start): LangGraph, LangChain/Groq, the scrapers
+# and torch/transformers load on first use or in the startup warm-up.
+# Check with: python -m benchmarks.bench_imports
+from app.core.hf_classifier import (
+    AVAILABLE_MODELS, CASCADE_MODEL_KEY, DEFAULT_MODEL, classify_chunks, classify_documents, import_runtime,
+    models_status, preload_models, scheduler, score_cache, start_inference_pool, stop_inference_pool,
+    inference_pool_stats,
+)
+from app.core.batch_scheduler import SchedulerFull
+from app.core.chunk_processor import chunk_text, chunk_text_for_model
+from app.core.page_cache import page_cache
+from app.core.result_cache import result_cache, result_key
+from app.core.jobs import job_queue
+from app.core.document_store import document_store
+from app.core.fast_json import OrjsonResponse, dumps
+from app.core.log import configure_logging, get_logger
+from app.core.metrics import http_request_seconds, http_requests, registry
+from app.core.profiling import PROFILING_ENABLED, profiled, span
+from app.core.executors import Overloaded, RETRY_AFTER_SECONDS, compute_executor, executor_stats, io_executor
+from app.core.warmup import warmup
+from app.langgraph.state import LLM_STAGES
 
 load_dotenv()
+configure_logging()
+logger = get_logger("api")
+
+app = FastAPI(default_response_class=OrjsonResponse)
 
-app = FastAPI()
+# Analysis payloads are large and repetitive JSON; streamed NDJSON/SSE must not be buffered
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=GZIP_MIN_BYTES,
+    compresslevel=GZIP_LEVEL,
+    exclude_content_types=DEFAULT_EXCLUDED_CONTENT_TYPES + ("application/x-ndjson",),
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,13 +58,148 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-class TextIn(BaseModel):
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route template (e.g. /jobs/{job_id}) keeps the label set small
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        http_request_seconds.observe(time.perf_counter() - started, method=request.method, route=path)
+        http_requests.inc(method=request.method, route=path, status=status)
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return OrjsonResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(SchedulerFull)
+async def scheduler_full_handler(request: Request, exc: SchedulerFull):
+    return OrjsonResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+def load_policy_graph():
+    """Import and compile the LangGraph app (once per process)."""
+    from app.langgraph.graph import get_policy_graph
+    return get_policy_graph()
+
+_policy_graph = None
+
+async def policy_graph():
+    # The first call imports LangGraph, LangChain and the scrapers: keep that off the event loop
+    global _policy_graph
+    if _policy_graph is None:
+        _policy_graph = await io_executor.run(load_policy_graph)
+    return _policy_graph
+
+def summarize(state: dict) -> str:
+    from app.langchain_modules.summarizer import summarize as run_summarize
+    return run_summarize(state)
+
+def explain(state: dict) -> str:
+    from app.langchain_modules.explainer import explain as run_explain
+    return run_explain(state)
+
+# The inference workers are forked before requests are served, sharing the
+# weights of PRELOAD_MODELS (a no-op unless INFERENCE_WORKERS > 0)
+warmup.add_step("inference_pool", start_inference_pool, before_serving=True)
+warmup.add_step("graph", load_policy_graph)
+warmup.add_step("model_runtime", import_runtime)
+warmup.add_step("models", preload_models)
+
+@app.on_event("startup")
+def start_warmup():
+    warmup.start()
+
+@app.on_event("startup")
+async def start_job_workers():
+    job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    await job_queue.stop()
+
+@app.on_event("shutdown")
+async def close_http_client():
+    from app.core.async_scraper import close_client
+    await close_client()
+
+@app.on_event("shutdown")
+def stop_workers():
+    stop_inference_pool()
+    io_executor.shutdown()
+    compute_executor.shutdown()
+
+class ProfileOptions(BaseModel):
+    # Opt-in per-request profiling (only when the server runs with PROFILING=1)
+    profile: bool = False               # span timing tree in the response's "profile" field
+    profile_cpu: bool = False           # + sampled CPU profile
+    profile_memory: bool = False        # + memory high-water mark
+
+def request_profile(data: ProfileOptions, name: str):
+    """Context manager yielding a Profile if `data` asks for one (else None)."""
+    if not (data.profile or data.profile_cpu or data.profile_memory):
+        return nullcontext()
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling is disabled on this server (set PROFILING=1)")
+    return profiled(name, cpu=data.profile_cpu, memory=data.profile_memory)
+
+class TextIn(ProfileOptions):
     text: str
     model: str = DEFAULT_MODEL
+    include_chunks: bool = False        # echo chunk text (otherwise fetch it via document_id)
+    include_score_matrix: bool = False  # per-chunk scores as base64 float16
+    chunking: Optional[str] = None      # "chars" | "tokens" (default: CHUNKING_MODE)
 
-class URLInput(BaseModel):
+class URLInput(ProfileOptions):
     url: str
     model: str = DEFAULT_MODEL
+    include_chunks: bool = False
+    include_score_matrix: bool = False
+    chunking: Optional[str] = None
+    force_refresh: bool = False         # bypass the URL result cache
+    # LLM stages to run after classification (concurrently); [] = labels only
+    include: Optional[List[Literal["explain", "summary"]]] = None
+
+def with_document(results: dict, include_chunks: bool = False) -> dict:
+    """
+    Keep the chunks server-side (document store) and answer with their
+    document_id; the chunk text itself is only echoed on request.
+    """
+    results = dict(results)
+    chunks = results.pop("chunks", None) or []
+    results["document_id"] = document_store.put(chunks) if chunks else None
+    if include_chunks:
+        results["chunks"] = chunks
+    return results
+
+def document_chunks(document_id: Optional[str], chunks: Optional[list] = None) -> list:
+    """Chunks sent by the client, else those of `document_id` (404 once it has expired)."""
+    if chunks or not document_id:
+        return chunks or []
+    stored = document_store.get(document_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired document_id; re-run the analysis or send chunks")
+    return stored
+
+def classify_text(text: str, model: str, include_score_matrix: bool = False, chunking: Optional[str] = None):
+    """Chunk + classify in one blocking call (run on the compute executor)."""
+    with span("chunk"):
+        chunks, features = chunk_text_for_model(text, model, chunking)
+    with span("classify", chunks=len(chunks)):
+        result = classify_chunks(chunks, model_name=model, include_score_matrix=include_score_matrix, features=features)
+    return chunks, result
 
 @app.post("/predict")
 async def predict(data: TextIn):
@@ -39,75 +207,475 @@ async def predict(data: TextIn):
     # It does NOT use LangGraph usually, or we can wrap it.
     # To correspond with "Paste Text" mode which expects breakdown:
     
-    # 1. Chunk
-    chunks = chunk_text(data.text)
-    
-    # 2. Classify
+    # 1. Chunk + 2. Classify (off the event loop)
     # classify_chunks returns {labels, scores, risks, risk_percentage}
-    result = classify_chunks(chunks, model_name=data.model)
+    with request_profile(data, "predict") as profile:
+        chunks, result = await compute_executor.run(
+            classify_text, data.text, data.model, data.include_score_matrix, data.chunking
+        )
     
     # 3. Return (frontend expects: labels, scores, risks, risk_percentage, model_used)
     result["model_used"] = AVAILABLE_MODELS.get(data.model, data.model)
-    result["chunks"] = chunks
-    return result
+    result = with_document({**result, "chunks": chunks}, data.include_chunks)
+    if profile is not None:
+        result["profile"] = profile.result()
+    return OrjsonResponse(result)
 
-@app.post("/analyze-url")
-async def analyze_url(data: URLInput):
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    print(f"\n[{timestamp}] [INFO] 🔍 Analyzing URL: {data.url}")
-    
-    # Invoke LangGraph
-    # We pass 'url' as initial state. The graph nodes will populate the rest.
+class BatchDocument(BaseModel):
+    text: str
+    id: Optional[str] = None
+
+class BatchIn(BaseModel):
+    documents: List[BatchDocument]
+    model: str = DEFAULT_MODEL
+    include_score_matrix: bool = False
+    include_chunks: bool = False
+    chunking: Optional[str] = None
+    stream: bool = False                # NDJSON, one line per document as its group finishes
+
+PREDICT_BATCH_MAX_DOCS = int(os.getenv("PREDICT_BATCH_MAX_DOCS", "1000"))
+PREDICT_BATCH_GROUP_SIZE = int(os.getenv("PREDICT_BATCH_GROUP_SIZE", "16"))
+
+def classify_texts(texts: list, model: str, include_score_matrix: bool = False, chunking: Optional[str] = None):
+    """Chunk every text, then classify the union of their chunks in shared batches (blocking)."""
+    chunked = [chunk_text_for_model(text, model, chunking) for text in texts]
+    documents = [chunks for chunks, _ in chunked]
+    features = [doc_features for _, doc_features in chunked]
+    results = classify_documents(documents, model_name=model, include_score_matrix=include_score_matrix, features=features)
+    return documents, results
+
+def batch_error_rows(data: BatchIn, indices: list, error: Exception) -> list:
+    """One error row per document of a failed group; backpressure errors also carry retry_after."""
+    row = {"error": str(error)}
+    if isinstance(error, (Overloaded, SchedulerFull)):
+        row["retry_after"] = getattr(error, "retry_after", RETRY_AFTER_SECONDS)
+    else:
+        logger.error("Batch group failed", extra={"documents": len(indices), "error": str(error)})
+    return [{"index": i, "id": data.documents[i].id, **row} for i in indices]
+
+def start_batch_groups(data: BatchIn) -> dict:
+    """
+    Schedule the documents of `data` in groups of PREDICT_BATCH_GROUP_SIZE on
+    the compute stage (a few groups at a time); returns {task: indices}. A
+    group that fails (including an overloaded stage) yields per-document error
+    rows instead of failing the whole batch.
+    """
+    groups = [
+        list(range(start, min(start + PREDICT_BATCH_GROUP_SIZE, len(data.documents))))
+        for start in range(0, len(data.documents), PREDICT_BATCH_GROUP_SIZE)
+    ]
+    limit = asyncio.Semaphore(compute_executor.workers)
+
+    async def run_group(indices: list):
+        try:
+            async with limit:
+                documents, results = await compute_executor.run(
+                    classify_texts, [data.documents[i].text for i in indices],
+                    data.model, data.include_score_matrix, data.chunking,
+                )
+        except Exception as e:
+            return batch_error_rows(data, indices, e)
+        rows = []
+        for i, chunks, result in zip(indices, documents, results):
+            row = {"index": i, "id": data.documents[i].id, "chunk_count": len(chunks), **result}
+            if data.include_chunks:
+                row["chunks"] = chunks
+            rows.append(row)
+        return rows
+
+    return {asyncio.ensure_future(run_group(indices)): indices for indices in groups}
+
+async def finished_batch_rows(pending: dict):
+    """Yield each group's rows as it finishes."""
     try:
-        final_state = policy_graph.invoke({"url": data.url})
-    except Exception as e:
-        print(f"[{timestamp}] [ERROR] Graph execution failed: {e}")
-        return {"error": str(e)}
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.pop(task)
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+def check_batch_size(data: BatchIn):
+    if len(data.documents) > PREDICT_BATCH_MAX_DOCS:
+        raise HTTPException(status_code=413, detail=f"At most {PREDICT_BATCH_MAX_DOCS} documents per request")
+
+@app.post("/predict-batch")
+async def predict_batch(data: BatchIn):
+    """
+    /predict for many documents per request. Each group's chunks are scored
+    together, and concurrent groups are coalesced further by the micro-batch
+    scheduler.
+    """
+    check_batch_size(data)
+    model_used = AVAILABLE_MODELS.get(data.model, data.model)
+    pending = start_batch_groups(data)
 
+    if not data.stream:
+        try:
+            grouped = await asyncio.gather(*pending)
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+        return {"model_used": model_used, "results": [row for rows in grouped for row in rows]}
+
+    async def lines():
+        async for rows in finished_batch_rows(pending):
+            for row in rows:
+                yield dumps({"model_used": model_used, **row}) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def llm_stages(data: URLInput) -> list:
+    return list(LLM_STAGES) if data.include is None else [stage for stage in LLM_STAGES if stage in data.include]
+
+def analysis_input(data: URLInput) -> dict:
+    # We pass 'url' as initial state. The graph nodes will populate the rest.
+    return {
+        "url": data.url,
+        "model": data.model,
+        "include_score_matrix": data.include_score_matrix,
+        "chunking": data.chunking,
+        "include": llm_stages(data),
+    }
+
+def analysis_key(data: URLInput) -> str:
+    return result_key(
+        data.url, data.model, chunking=data.chunking, include_score_matrix=data.include_score_matrix,
+        include="+".join(llm_stages(data)),
+    )
+
+def is_cacheable(results: dict) -> bool:
+    # Don't pin a failed scrape (no text) for the whole TTL
+    return results["chunk_count"] > 0
+
+def analysis_response(final_state: dict) -> dict:
     # Map state to response
-    results = {
+    return {
         "labels": final_state.get("labels", []),
         "scores": final_state.get("scores", []),
-        "risk_levels": final_state.get("risks", []),      # Map "risks" from state to "risk_levels" in response if needed,                                                           # but consistency suggests we just pass it through.
         "risks": final_state.get("risks", []),            # Correctly map the key from hf_classifier
         "risk_percentage": final_state.get("risk_percentage", {}), 
+        "relevant_chunks": final_state.get("relevant_chunks", {}),
         "explanation": final_state.get("explanation", ""),
         "summary": final_state.get("summary", ""),
         "chunk_count": len(final_state.get("chunks", [])),
+        "score_matrix": final_state.get("score_matrix"),
+        "cascade": final_state.get("cascade"),
         "chunks": final_state.get("chunks", []),
+        "fetch_issues": final_state.get("fetch_issues", []),
+        "policy_url": final_state.get("policy_url"),
         "url": final_state.get("url", "")
     }
 
-    print(f"[{timestamp}] [INFO] 📊 Analysis Complete!")
-    return results
+async def cached_analysis(data: URLInput, run_graph):
+    """Run `run_graph` once per URL + options: cached, and shared by concurrent identical requests."""
+    if result_cache:
+        return await result_cache.get_or_compute(
+            analysis_key(data), run_graph, force_refresh=data.force_refresh, cacheable=is_cacheable
+        )
+    return await run_graph(), "miss"
+
+@app.post("/analyze-url")
+async def analyze_url(data: URLInput):
+    logger.info("Analyzing URL", extra={"url": data.url, "model": data.model})
+    
+    # Invoke LangGraph
+    async def run_graph():
+        graph = await policy_graph()
+        final_state = await graph.ainvoke(analysis_input(data))
+        return analysis_response(final_state)
+
+    profile_context = request_profile(data, "analyze-url")
+    try:
+        with profile_context as profile:
+            if profile is not None:
+                # A profile should show the pipeline, not a cache hit or someone else's run
+                results, source = await run_graph(), "bypass"
+            else:
+                results, source = await cached_analysis(data, run_graph)
+    except (Overloaded, SchedulerFull):
+        raise
+    except Exception as e:
+        logger.error("Graph execution failed", extra={"url": data.url, "error": str(e)})
+        return {"error": str(e)}
+
+    results = with_document({**results, "cache": source}, data.include_chunks)
+    if profile is not None:
+        results["profile"] = profile.result()
+
+    logger.info("Analysis complete", extra={"url": data.url, "chunks": results["chunk_count"], "cache": source})
+    return OrjsonResponse(results)
+
+# Payload sent when each analysis node finishes (the full result follows in "done")
+STREAM_NODE_FIELDS = {
+    "scrape": lambda state: {"url": state.get("url", ""), "policy_url": state.get("policy_url"),
+                             "text_length": len(state.get("raw_text", "")),
+                             "fetch_issues": state.get("fetch_issues", [])},
+    "chunk": lambda state: {"chunk_count": len(state.get("chunks", []))},
+    "classify": lambda state: {key: state.get(key) for key in
+                               ("labels", "scores", "risks", "risk_percentage", "relevant_chunks", "cascade", "score_matrix")},
+    "explain": lambda state: {"explanation": state.get("explanation", "")},
+    "summary": lambda state: {"summary": state.get("summary", "")},
+}
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+@app.post("/analyze-url/stream")
+async def analyze_url_stream(data: URLInput):
+    """
+    Server-Sent Events variant of /analyze-url. Emits one event per finished
+    graph node (scrape, chunk, classify, explain, summary), "token" events
+    while the explanation and summary are generated, and a final "done"
+    event with the same payload /analyze-url returns.
+    """
+    logger.info("Streaming analysis of URL", extra={"url": data.url, "model": data.model})
+
+    async def events():
+        key = analysis_key(data)
+        if result_cache:
+            cached = None if data.force_refresh else result_cache.get(key)
+            if cached is not None:
+                yield sse_event("done", with_document({**cached, "cache": "hit"}, data.include_chunks))
+                return
+            inflight = result_cache.inflight(key)
+            if inflight is not None:
+                try:
+                    results = await result_cache.join(inflight)
+                except asyncio.CancelledError:
+                    if not inflight.cancelled():
+                        raise
+                    yield sse_event("error", {"detail": "The shared analysis was cancelled, please retry"})
+                    return
+                except Exception as e:
+                    yield sse_event("error", {"detail": str(e)})
+                    return
+                yield sse_event("done", with_document({**results, "cache": "shared"}, data.include_chunks))
+                return
+            future = result_cache.claim(key)
+
+        final_state = {}
+        try:
+            graph = await policy_graph()
+            async for mode, payload in graph.astream(analysis_input(data), stream_mode=["updates", "messages"]):
+                if mode == "messages":
+                    message, metadata = payload
+                    if message.content:
+                        yield sse_event("token", {"node": metadata.get("langgraph_node"), "text": message.content})
+                    continue
+                for node, update in payload.items():
+                    final_state.update(update or {})
+                    if node in STREAM_NODE_FIELDS:
+                        yield sse_event(node, STREAM_NODE_FIELDS[node](final_state))
+        except BaseException as e:
+            if result_cache:
+                result_cache.release(key, future, error=e)
+            if not isinstance(e, Exception):
+                raise  # the client went away (generator closed / cancelled)
+            if isinstance(e, (Overloaded, SchedulerFull)):
+                yield sse_event("error", {"detail": str(e), "retry_after": getattr(e, "retry_after", RETRY_AFTER_SECONDS)})
+            else:
+                logger.error("Graph execution failed", extra={"url": data.url, "error": str(e)})
+                yield sse_event("error", {"detail": str(e)})
+            return
+
+        results = analysis_response(final_state)
+        if result_cache:
+            result_cache.release(key, future, results, cache=is_cacheable(results))
+        yield sse_event("done", with_document({**results, "cache": "miss"}, data.include_chunks))
+        logger.info("Streaming analysis complete", extra={"url": data.url, "chunks": results["chunk_count"]})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# --- Background jobs ---
+# For clients behind proxies with short timeouts (e.g. the Vercel deployment):
+# submit with POST /jobs, then poll GET /jobs/{id}.
+
+async def analyze_url_job(job, data: URLInput):
+    async def run_graph():
+        final_state, partial = {}, {}
+        graph = await policy_graph()
+        async for update in graph.astream(analysis_input(data), stream_mode="updates"):
+            for node, node_update in update.items():
+                final_state.update(node_update or {})
+                if node in STREAM_NODE_FIELDS:
+                    partial.update(STREAM_NODE_FIELDS[node](final_state))
+                    job.report({"stages_done": job.progress.get("stages_done", []) + [node]}, partial=dict(partial))
+        return analysis_response(final_state)
+
+    results, source = await cached_analysis(data, run_graph)
+    return with_document({**results, "cache": source}, data.include_chunks)
+
+async def predict_batch_job(job, data: BatchIn):
+    rows = []
+    job.report({"documents": len(data.documents), "documents_done": 0})
+    async for group_rows in finished_batch_rows(start_batch_groups(data)):
+        rows.extend(group_rows)
+        rows.sort(key=lambda row: row["index"])
+        job.report({"documents_done": len(rows)}, partial={"results": list(rows)})
+    return {"model_used": AVAILABLE_MODELS.get(data.model, data.model), "results": rows}
+
+# kind -> (payload model, runner)
+JOB_KINDS = {
+    "analyze-url": (URLInput, analyze_url_job),
+    "predict-batch": (BatchIn, predict_batch_job),
+}
+
+class JobIn(BaseModel):
+    kind: str                           # "analyze-url" | "predict-batch"
+    payload: dict                       # the body the matching endpoint takes
+    priority: int = 0                   # higher runs first
+
+@app.post("/jobs", status_code=202)
+async def submit_job(data: JobIn):
+    if data.kind not in JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind '{data.kind}', expected one of {list(JOB_KINDS)}")
+    payload_model, runner = JOB_KINDS[data.kind]
+    try:
+        payload = payload_model(**data.payload)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    if isinstance(payload, ProfileOptions) and (payload.profile or payload.profile_cpu or payload.profile_memory):
+        # Jobs run detached from the request, so there is no response to attach a profile to
+        raise HTTPException(status_code=400, detail="Profiling is not available for jobs; profile the endpoint directly")
+    if data.kind == "predict-batch":
+        check_batch_size(payload)
+
+    job = job_queue.submit(data.kind, lambda job: runner(job, payload), priority=data.priority)
+    logger.info("Queued job", extra={"job": job.id, "kind": data.kind, "priority": data.priority})
+    return OrjsonResponse(status_code=202, content=job.to_dict(), headers={"Location": f"/jobs/{job.id}"})
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return OrjsonResponse(job.to_dict())
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job.to_dict()
+
+@app.get("/documents/{document_id}")
+async def get_document(document_id: str, start: int = 0, end: Optional[int] = None):
+    """Chunk text of an analyzed document; chunk i of the response is chunk start+i of the document."""
+    chunks = document_chunks(document_id)
+    return OrjsonResponse({
+        "document_id": document_id,
+        "chunk_count": len(chunks),
+        "start": start,
+        "chunks": chunks[start:end],
+    })
+
+@app.get("/health")
+async def health():
+    """Liveness: answers as soon as the app is imported, warm-up or not."""
+    return {"status": "ok", "warmup": warmup.stats()}
 
 @app.get("/models")
 async def get_available_models():
-    return {"available_models": list(AVAILABLE_MODELS.keys()), "default_model": DEFAULT_MODEL}
+    return {
+        "available_models": list(AVAILABLE_MODELS.keys()) + [CASCADE_MODEL_KEY],
+        "default_model": DEFAULT_MODEL,
+        **models_status(),
+    }
+
+@app.get("/stats")
+async def get_stats():
+    return {
+        "executors": executor_stats(),
+        "scheduler": scheduler.stats(),
+        "score_cache": score_cache.stats() if score_cache else None,
+        "inference_pool": inference_pool_stats(),
+        "page_cache": page_cache.stats() if page_cache else None,
+        "result_cache": result_cache.stats() if result_cache else None,
+        "document_store": document_store.stats(),
+        "jobs": job_queue.stats(),
+        "warmup": warmup.stats(),
+    }
+
+def component_metrics():
+    """Scrape-time metrics read from the caches, stage executors, scheduler and job queue."""
+    lookups, ratios = [], []
+
+    def cache(name: str, outcomes: dict, hit_outcomes: tuple):
+        lookups.extend(({"cache": name, "outcome": outcome}, count) for outcome, count in outcomes.items())
+        total = sum(outcomes.values())
+        ratios.append(({"cache": name}, sum(outcomes[o] for o in hit_outcomes) / total if total else 0))
+
+    if score_cache:
+        stats = score_cache.stats()
+        cache("score", {o: stats[o] for o in ("memory_hits", "disk_hits", "misses")}, ("memory_hits", "disk_hits"))
+    if result_cache:
+        stats = result_cache.stats()
+        cache("result", {o: stats[o] for o in ("hits", "shared", "misses")}, ("hits", "shared"))
+    if page_cache:
+        cache("page", page_cache.stats()["outcomes"], ("hit", "revalidated"))
+
+    executors = executor_stats()
+    queue_depths = [] if scheduler is None else [
+        ({"model": key}, stats["queue_depth"]) for key, stats in scheduler.stats()["models"].items()
+    ]
+    jobs = job_queue.stats()
+    return [
+        ("cache_lookups_total", "counter", "Cache lookups by cache and outcome", lookups),
+        ("cache_hit_ratio", "gauge", "Share of cache lookups served without recomputation", ratios),
+        ("stage_pending", "gauge", "Calls admitted to a stage executor and not finished",
+         [({"stage": name}, stats["pending"]) for name, stats in executors.items()]),
+        ("stage_rejected_total", "counter", "Calls rejected with 429 by a stage executor",
+         [({"stage": name}, stats["rejected"]) for name, stats in executors.items()]),
+        ("inference_queue_depth", "gauge", "Requests waiting in the micro-batch scheduler", queue_depths),
+        ("jobs", "gauge", "Background jobs by status", [({"status": k}, v) for k, v in jobs["jobs"].items()]),
+    ]
+
+registry.add_collector(component_metrics)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of the per-stage latency, volume and cache metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 # --- Chatbot Integration ---
-from app.langgraph.graph import policy_graph
 
-class ChatRequest(BaseModel):
+class ChatRequest(ProfileOptions):
     message: str
     chunks: list[str] = []
+    document_id: Optional[str] = None   # instead of chunks, from an analysis response
     # Optional: session_id, risks, etc.
 
 @app.post("/chat")
 async def chat_endpoint(data: ChatRequest):
-    print(f"DEBUG: Chat request: {data.message}")
+    logger.debug("Chat request", extra={"chat_message": data.message})
     
     # Invoke Unified Policy Graph
     inputs = {
         "user_message": data.message,
-        "chunks": data.chunks
+        "chunks": document_chunks(data.document_id, data.chunks)
     }
     
+    profile_context = request_profile(data, "chat")
     try:
-        final_state = policy_graph.invoke(inputs)
-        return final_state.get("chat_response", {}) 
+        with profile_context as profile:
+            graph = await policy_graph()
+            final_state = await io_executor.run(graph.invoke, inputs)
+        response = final_state.get("chat_response", {})
+        if profile is not None:
+            response = {**response, "profile": profile.result()}
+        return response
+    except Overloaded:
+        raise
     except Exception as e:
-        print(f"ERROR: Chatbot failed: {e}")
+        logger.error("Chatbot failed", extra={"error": str(e)})
         return {"error": str(e)}
 
 
@@ -120,10 +688,10 @@ async def analyze_text(req: dict):
         raise HTTPException(status_code=400, detail="Text too short")
 
     # SAME pipeline as /predict (do NOT call the endpoint)
-    chunks = chunk_text(text)
-
     # IMPORTANT: match classify_chunks return signature
-    result = classify_chunks(chunks, model)
+    chunks, result = await compute_executor.run(
+        classify_text, text, model, bool(req.get("include_score_matrix")), req.get("chunking")
+    )
 
     # classify_chunks may return dict OR tuple depending on your implementation
     if isinstance(result, dict):
@@ -135,42 +703,52 @@ async def analyze_text(req: dict):
 
     # LLM-powered summary (safe-guarded)
     try:
-        summary = summarize(chunks)
+        summary = await io_executor.run(summarize, {"chunks": chunks})
+    except Overloaded:
+        raise
     except Exception as e:
-        print("Summary error:", e)
+        logger.error("Summary failed", extra={"error": str(e)})
         summary = None
 
-    return {
+    return OrjsonResponse(with_document({
         "labels": labels,
         "scores": scores,
+        "score_matrix": result.get("score_matrix") if isinstance(result, dict) else None,
+        "cascade": result.get("cascade") if isinstance(result, dict) else None,
         "evidence": evidence,
         "chunks": chunks,
         "summary": summary,
         "model_used": model
-    }
+    }, bool(req.get("include_chunks"))))
 
 @app.post("/summarize")
 async def summarize_endpoint(req: dict):
     chunks = req.get("chunks")
+    if not chunks and req.get("document_id"):
+        chunks = document_store.get(req["document_id"])
     if not chunks:
-        # Fallback to text if chunks aren't provided
+        # Fallback to text if chunks aren't provided (or the document expired)
         text = req.get("text")
         if not text:
+            if req.get("document_id"):
+                document_chunks(req["document_id"])  # 404: expired
             raise HTTPException(status_code=400, detail="No content provided")
-        chunks = chunk_text(text)
+        chunks = await compute_executor.run(chunk_text, text)
     
     try:
-        summary = summarize({"chunks": chunks})
+        summary = await io_executor.run(summarize, {"chunks": chunks})
         return {"summary": summary}
+    except Overloaded:
+        raise
     except Exception as e:
-        print("Summary error:", e)
+        logger.error("Summary failed", extra={"error": str(e)})
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/explain")
 async def explain_endpoint(req: dict):
     # This expects a state-like dict with 'labels' and 'relevant_chunks'
     labels = req.get("labels", [])
-    chunks = req.get("chunks", [])
+    chunks = document_chunks(req.get("document_id"), req.get("chunks"))
     
     # If we have chunks but no relevant_chunks mapping, we might need to find them
     # But for now, let's assume the frontend passes what it has or we use the chunks
@@ -184,11 +762,13 @@ async def explain_endpoint(req: dict):
         relevant_chunks = {label: "\n".join(chunks[:3]) for label in labels}
 
     try:
-        explanation = explain({
+        explanation = await io_executor.run(explain, {
             "labels": labels,
              "relevant_chunks": relevant_chunks
         })
         return {"explanation": explanation}
+    except Overloaded:
+        raise
     except Exception as e:
-        print("Explanation error:", e)
+        logger.error("Explanation failed", extra={"error": str(e)})
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,102 @@
+# benchmarks/bench_extract.py
+"""
+Speed and parity benchmark for the HTML extraction backends.
+
+Runs every backend on the saved policy pages in benchmarks/pages (plus any
+paths given on the command line), checks that lxml returns exactly what bs4
+returns, and prints the median parse time per page. Pages listed in
+KNOWN_DIFFERENCES are expected to differ (see app/core/html_extract.py) and
+do not fail the run.
+
+    cd backend
+    python -m benchmarks.bench_extract
+    python -m benchmarks.bench_extract --synthetic-mb 2 --repeat 3
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import time
+
+from app.core.html_extract import EXTRACTORS
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+
+# Bundled pages on which libxml2 and html.parser build different trees by design
+KNOWN_DIFFERENCES = {
+    "adversarial_parser_quirks.html": "nested <p>, CDATA section and \\r\\n line breaks",
+}
+
+
+def synthetic_page(size_mb: float) -> str:
+    """Build a large policy-like page by nesting and repeating the bundled samples."""
+    with open(os.path.join(PAGES_DIR, "example_privacy.html")) as f:
+        sample = f.read()
+    body = sample[sample.index("<body>") + len("<body>"):sample.index("</body>")]
+
+    parts, size, i = [], 0, 0
+    while size < size_mb * 1024 * 1024:
+        block = f'<div class="wrapper-{i}"><div><div>{body.replace("Example Co.", f"Example Co. {i}")}</div></div></div>'
+        parts.append(block)
+        size += len(block)
+        i += 1
+    return "<html><head><title>Synthetic policy</title></head><body>" + "".join(parts) + "</body></html>"
+
+
+def time_backend(fn, html: str, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(html)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML extraction backends")
+    parser.add_argument("pages", nargs="*", help="extra HTML files to include")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--synthetic-mb", type=float, default=0, help="also run on a generated page of this size")
+    args = parser.parse_args()
+
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, "*.html"))) + args.pages:
+        # newline="": pages are passed on verbatim (\r\n included), as scraped
+        with open(path, encoding="utf-8", errors="replace", newline="") as f:
+            pages[os.path.basename(path)] = f.read()
+    if args.synthetic_mb:
+        pages[f"synthetic-{args.synthetic_mb:g}MB"] = synthetic_page(args.synthetic_mb)
+
+    mismatches, expected = 0, []
+    print(f"{'page':<32} {'KB':>8} " + " ".join(f"{name + ' ms':>10}" for name in EXTRACTORS) + "  paragraphs  parity")
+    for name, html in pages.items():
+        results, timings = {}, {}
+        for backend, fn in EXTRACTORS.items():
+            timings[backend], results[backend] = time_backend(fn, html, args.repeat)
+
+        reference = results["bs4"]
+        parity = all(result == reference for result in results.values())
+        if parity:
+            status = "ok"
+        elif name in KNOWN_DIFFERENCES:
+            status = "expected"
+            expected.append(name)
+        else:
+            status = "MISMATCH"
+            mismatches += 1
+        print(
+            f"{name:<32} {len(html) / 1024:>8.0f} "
+            + " ".join(f"{1000 * timings[b]:>10.1f}" for b in EXTRACTORS)
+            + f"  {len(reference):>10}  {status}"
+        )
+
+    for name in expected:
+        print(f"{name}: known difference ({KNOWN_DIFFERENCES[name]})")
+    if mismatches:
+        raise SystemExit(f"{mismatches} page(s) differ between backends")
+
+
+if __name__ == "__main__":
+    main()
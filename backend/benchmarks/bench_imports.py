@@ -0,0 +1,115 @@
+# benchmarks/bench_imports.py
+"""
+Import-time (cold start) benchmark for the API module.
+
+Imports the module in fresh interpreters with `python -X importtime`, keeps
+the fastest of --repeat runs, and prints the total import time, the most
+expensive top-level packages (self time of all their submodules) and the
+cumulative time of each app module. Fails if a package that is supposed to
+load lazily (torch, LangGraph, ...) is imported eagerly, or if the total
+exceeds --budget-ms or regresses past a saved --baseline.
+
+    cd backend
+    python -m benchmarks.bench_imports
+    python -m benchmarks.bench_imports --save import_baseline.json
+    python -m benchmarks.bench_imports --baseline import_baseline.json --max-regression 0.2
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use or by the startup warm-up, never by importing the API
+LAZY_PACKAGES = (
+    "torch", "transformers", "onnxruntime", "langgraph", "langchain_core", "langchain_groq",
+    "langchain_text_splitters", "groq", "bs4", "requests", "httpx",
+)
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_profile(module: str) -> dict:
+    """{module name: (self us, cumulative us)} for one cold import of `module`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    profile = {}
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            profile[name] = (int(self_us), int(cumulative_us))
+    return profile
+
+
+def summarize(profile: dict, module: str) -> dict:
+    packages = defaultdict(int)
+    for name, (self_us, _) in profile.items():
+        packages[name.split(".")[0]] += self_us
+    return {
+        "total_ms": profile[module][1] / 1000,
+        "packages": {name: us / 1000 for name, us in packages.items()},
+        "app_modules": {
+            name: cumulative / 1000 for name, (_, cumulative) in profile.items()
+            if name == module or name.startswith("app.")
+        },
+        "lazy_imported": sorted(name for name in LAZY_PACKAGES if name in profile),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cold import of the API module")
+    parser.add_argument("--module", default="backend_fastapi")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters; the fastest run is reported")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=0, help="fail above this total import time (0 = no budget)")
+    parser.add_argument("--baseline", help="JSON written by --save to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed slowdown vs --baseline (0.25 = 25%%)")
+    parser.add_argument("--save", help="write this run's summary as a baseline")
+    args = parser.parse_args()
+
+    runs = [summarize(import_profile(args.module), args.module) for _ in range(args.repeat)]
+    result = min(runs, key=lambda run: run["total_ms"])
+
+    print(f"import {args.module}: {result['total_ms']:.1f} ms (fastest of {args.repeat})\n")
+    print(f"{'package':<32} {'self ms':>10}")
+    for name, ms in sorted(result["packages"].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<32} {ms:>10.1f}")
+    print(f"\n{'app module':<32} {'cumulative ms':>14}")
+    for name, ms in sorted(result["app_modules"].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<32} {ms:>14.1f}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+
+    failures = []
+    if result["lazy_imported"]:
+        failures.append(f"imported eagerly: {', '.join(result['lazy_imported'])}")
+    if args.budget_ms and result["total_ms"] > args.budget_ms:
+        failures.append(f"{result['total_ms']:.1f} ms exceeds the {args.budget_ms:g} ms budget")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        limit = baseline["total_ms"] * (1 + args.max_regression)
+        print(f"\nbaseline: {baseline['total_ms']:.1f} ms (limit {limit:.1f} ms)")
+        if result["total_ms"] > limit:
+            failures.append(f"{result['total_ms']:.1f} ms regresses past the baseline limit of {limit:.1f} ms")
+        new = sorted(set(result["packages"]) - set(baseline["packages"]))
+        if new:
+            print(f"packages not in the baseline: {', '.join(new)}")
+    if failures:
+        raise SystemExit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
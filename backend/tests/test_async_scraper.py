@@ -0,0 +1,114 @@
+# tests/test_async_scraper.py
+"""
+The async scraper against a local stand-in server (an httpx mock transport).
+
+    cd backend
+    python -m pytest tests
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import async_scraper
+
+POLICY = "".join(
+    f"<p>Section {i}. We collect personal information such as your email address and share it with "
+    f"third parties only with your consent. You can opt out of data retention at any time.</p>"
+    for i in range(6)
+)
+
+PAGES = {
+    "/": '<html><body><main>Welcome</main><footer><a href="/legal/privacy-policy">Privacy Policy</a></footer></body></html>',
+    "/legal/privacy-policy": f"<html><body><h1>Privacy Policy</h1>{POLICY}</body></html>",
+}
+
+
+class StandInServer:
+    """Serves PAGES and records per-host concurrency and User-Agents."""
+
+    def __init__(self, pages=PAGES, deny_first=(), delay=0.0):
+        self.pages = pages
+        self.deny_first = set(deny_first)
+        self.delay = delay
+        self.requests = []
+        self.in_flight = {}
+        self.max_in_flight = {}
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        host, path = request.url.host, request.url.path
+        self.requests.append((host, path, request.headers.get("user-agent", "")))
+        self.in_flight[host] = self.in_flight.get(host, 0) + 1
+        self.max_in_flight[host] = max(self.max_in_flight.get(host, 0), self.in_flight[host])
+        try:
+            await asyncio.sleep(self.delay)
+            if path in self.deny_first:
+                self.deny_first.discard(path)
+                return httpx.Response(403)
+            if path not in self.pages:
+                return httpx.Response(404)
+            return httpx.Response(200, html=self.pages[path])
+        finally:
+            self.in_flight[host] -= 1
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(async_scraper, "page_cache", None)
+    monkeypatch.setattr(async_scraper, "_loop_states", {})
+    server = StandInServer()
+    async_scraper.set_client(httpx.AsyncClient(transport=httpx.MockTransport(server)))
+    yield server
+    async_scraper.set_client(None)
+
+
+def test_discovers_policy_from_landing_page(server):
+    url, paragraphs = asyncio.run(async_scraper.get_terms_text_async("https://example.com"))
+    assert url == "https://example.com/legal/privacy-policy"
+    assert len(paragraphs) >= 6
+    assert server.requests[0][:2] == ("example.com", "/")
+
+
+def test_retries_denied_request_with_mobile_user_agent(server):
+    server.deny_first = {"/legal/privacy-policy"}
+    page = asyncio.run(async_scraper.fetch("https://example.com/legal/privacy-policy"))
+    assert page.status_code == 200
+    assert server.requests[-1][2] == async_scraper.MOBILE_USER_AGENT
+
+
+def test_per_host_limit(server, monkeypatch):
+    monkeypatch.setattr(async_scraper, "PER_HOST_LIMIT", 2)
+    server.delay = 0.02
+
+    async def crawl():
+        urls = [f"https://{host}/legal/privacy-policy" for host in ("a.test", "b.test") for _ in range(6)]
+        await asyncio.gather(*(async_scraper.fetch(url) for url in urls))
+
+    asyncio.run(crawl())
+    assert server.max_in_flight == {"a.test": 2, "b.test": 2}
+
+
+def test_host_state_is_bounded(server, monkeypatch):
+    monkeypatch.setattr(async_scraper, "MAX_HOSTS", 5)
+
+    async def crawl():
+        for i in range(50):
+            await async_scraper.fetch(f"https://host{i}.test/")
+        return async_scraper._state()
+
+    state = asyncio.run(crawl())
+    assert len(state.hosts) == 5
+    assert list(state.hosts)[-1] == "host49.test"
+
+
+def test_default_client_is_per_event_loop(monkeypatch):
+    monkeypatch.setattr(async_scraper, "_loop_states", {})
+
+    async def client():
+        return async_scraper.get_client()
+
+    first, second = asyncio.run(client()), asyncio.run(client())
+    assert first is not second
+    # The finished loop's state is dropped when the next loop creates its own
+    assert len(async_scraper._loop_states) == 1
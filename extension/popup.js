@@ -42,6 +42,8 @@ const copyBtn = document.getElementById("copyLabels");
  * STATE
  ***********************/
 let policyChunks = [];
+let policyDocumentId = null;
+let analysisRequest = null;  // { url, body } of the last analysis, replayed to recover lost chunks
 let currentSummary = "";
 let currentExplanation = "";
 let currentRelevantChunks = {};
@@ -67,6 +69,43 @@ function escapeHtml(str) {
     .replaceAll(">", "&gt;");
 }
 
+// Re-run the last analysis with the chunk text echoed. Only needed when the
+// server has lost the document, so analyses don't download the chunks up front.
+async function refetchChunks() {
+  if (!analysisRequest) return false;
+  const resp = await fetch(analysisRequest.url, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ ...analysisRequest.body, include_chunks: true })
+  });
+  if (!resp.ok) return false;
+  const data = await resp.json();
+  policyChunks = data.chunks || [];
+  policyDocumentId = data.document_id || null;
+  return policyChunks.length > 0;
+}
+
+// POST to /chat, /explain or /summarize. The chunks are referenced by the
+// server-side document id; if the server no longer has it (expired, restarted,
+// or another instance), the chunks are fetched again and the request is
+// retried once with them inline.
+async function postWithDocument(url, body) {
+  const post = extra => fetch(url, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ ...body, ...extra })
+  });
+
+  let resp = policyDocumentId
+    ? await post({ document_id: policyDocumentId })
+    : await post({ chunks: policyChunks });
+  if (resp.status === 404 && policyDocumentId && await refetchChunks()) {
+    resp = await post({ chunks: policyChunks });
+  }
+  if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+  return resp.json();
+}
+
 function clearResults() {
   labelsUl.innerHTML = "";
   evidenceDiv.innerHTML = "";
@@ -81,6 +120,8 @@ function clearResults() {
   currentExplanation = "";
   currentRelevantChunks = {};
   policyChunks = [];
+  policyDocumentId = null;
+  analysisRequest = null;
 }
 
 function formatChat(text) {
@@ -144,6 +185,7 @@ function renderResults(data) {
   }
 
   policyChunks = data.chunks || [];
+  policyDocumentId = data.document_id || null;
   currentSummary = data.summary || "";
   currentExplanation = data.explanation || "";
   currentRelevantChunks = data.relevant_chunks || {};
@@ -165,19 +207,21 @@ async function classifyText(text) {
   setModelState('loading');
 
   try {
-    const resp = await fetch(DEFAULT_BACKEND, {
+    const request = {
+      url: DEFAULT_BACKEND,
+      body: { text, model: modelSelect.value }
+    };
+    const resp = await fetch(request.url, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        text,
-        model: modelSelect.value
-      })
+      body: JSON.stringify(request.body)
     });
 
     if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
 
     const data = await resp.json();
     renderResults(data);
+    analysisRequest = request;
 
     // Clean success state
     setModelState('ready');
@@ -204,19 +248,26 @@ classifyBtn.addEventListener("click", async () => {
     setModelState(modelSelect.value);
 
     try {
-      const resp = await fetch("http://localhost:8000/analyze-url", {
+      const request = {
+        url: "http://localhost:8000/analyze-url",
+        body: {
+          url: url,
+          model: modelSelect.value,
+          // Summary and explanation are fetched when their sections are opened
+          include: []
+        }
+      };
+      const resp = await fetch(request.url, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          url: url,
-          model: modelSelect.value
-        })
+        body: JSON.stringify(request.body)
       });
 
       if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
 
       const data = await resp.json();
       renderResults(data);
+      analysisRequest = request;
       setStatus("URL analysis complete");
       return;
     } catch (err) {
@@ -311,16 +362,9 @@ toggleDeepBtn.addEventListener("click", async () => {
   summaryText.innerHTML = "<p>Generating summary…</p>";
 
   try {
-    const resp = await fetch("http://localhost:8000/summarize", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        chunks: policyChunks,
-        text: textEl.value
-      })
+    const data = await postWithDocument("http://localhost:8000/summarize", {
+      text: textEl.value
     });
-
-    const data = await resp.json();
     currentSummary = data.summary || "No summary available.";
     summaryText.innerHTML = formatChat(currentSummary);
     summaryLoaded = true;
@@ -345,17 +389,10 @@ toggleExplainBtn.addEventListener("click", async () => {
   try {
     const labels = Array.from(labelsUl.children).map(li => li.textContent);
 
-    const resp = await fetch("http://localhost:8000/explain", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        labels,
-        chunks: policyChunks,
-        relevant_chunks: currentRelevantChunks
-      })
+    const data = await postWithDocument("http://localhost:8000/explain", {
+      labels,
+      relevant_chunks: currentRelevantChunks
     });
-
-    const data = await resp.json();
     currentExplanation = data.explanation || "No explanation available.";
     explanationText.innerHTML = formatChat(currentExplanation);
     explanationLoaded = true;
@@ -386,16 +423,7 @@ sendChatBtn.addEventListener("click", async () => {
   `;
 
   try {
-    const resp = await fetch(CHAT_ENDPOINT, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        message: msg,
-        chunks: policyChunks
-      })
-    });
-
-    const data = await resp.json();
+    const data = await postWithDocument(CHAT_ENDPOINT, { message: msg });
 
     // Bot bubble (formatted)
     chatMessages.innerHTML += `